@@ -19,8 +19,10 @@ import time
 import random
 import logging
 from collections import deque
-from datetime import datetime
-from typing import List, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
+from datetime import datetime, timezone
+from typing import List, Sequence
 from dotenv import load_dotenv
 
 from rich.live import Live
@@ -29,7 +31,6 @@ from rich.layout import Layout
 from rich.console import Console
 from rich.panel import Panel
 import litellm
-import logging
 
 # Suppress LiteLLM verbose logging completely
 litellm.set_verbose = False
@@ -38,10 +39,12 @@ logging.getLogger("LiteLLM").setLevel(logging.CRITICAL)
 logging.getLogger("litellm").setLevel(logging.CRITICAL)
 
 from src.market.engine import MarketEngine
+from src.market.ledger import MEMORY_DB
 from src.agents.trader import Trader
 from src.market.schema import AgentAction, Transaction, ActionLog, InteractionLog, DEFAULT_ITEM
-from src.utils.personas import PERSONAS, get_model_for_persona
+from src.utils.personas import PERSONAS, get_model_by_index
 from src.utils.checkpoints import build_checkpoint, write_checkpoint
+from src.memory.memory import flush_memories, warm_up_embedder
 from src.analysis.report import generate_report
 
 # --- Configuration ---
@@ -52,6 +55,7 @@ load_dotenv()
 # Simulation Parameters
 NUM_AGENTS = 12       # Number of agents to spawn
 Tick_Duration = 2.0   # Minimum duration of a simulation tick (seconds)
+DB_PATH = "market.db" # Ledger database file
 
 console = Console()
 
@@ -102,13 +106,13 @@ def create_market_table(state) -> Panel:
     
     return Panel(table, title="Order Book & Price")
 
-def create_activity_table(agents: List[Trader], recent_actions: Iterable[ActionLog]) -> Panel:
+def create_activity_table(agents: List[Trader], recent_actions: Sequence[ActionLog]) -> Panel:
     """
     Renders the Agent Activity feed. 
     
     Args:
         agents (List[Trader]): List of all agents (for ID->Model lookup).
-        recent_actions (Iterable[ActionLog]): List of recent action logs.
+        recent_actions (Sequence[ActionLog]): Recent action logs, oldest first.
     """
     table = Table(title="Agent Activity & Decisions")
     table.add_column("Agent / Model", style="white")
@@ -118,7 +122,10 @@ def create_activity_table(agents: List[Trader], recent_actions: Iterable[ActionL
     # Create a quick lookup for agent models to display next to ID
     agent_models = {a.id: a.model_name for a in agents}
 
-    for act in list(recent_actions)[-10:]: # Show last 10 actions only
+    # Show last 10 actions only. Walk the tail from the right instead of copying
+    # the whole feed every frame. https://github.com/python/cpython/blob/main/Doc/library/itertools.rst (Context7 /python/cpython)
+    latest = list(islice(reversed(recent_actions), 10))
+    for act in reversed(latest):
         # Color coding for actions
         color = "green" if act.action == AgentAction.BUY else "red" if act.action == AgentAction.SELL else "yellow"
         
@@ -158,6 +165,8 @@ def parse_args():
     parser.add_argument("--seed-inventory", type=int, default=1, help="Initial units assigned to each agent.")  # https://github.com/python/cpython/blob/main/Doc/library/argparse.rst (Context7 /python/cpython)
     parser.add_argument("--report-dir", type=str, default="reports", help="Directory for post-run reports.")
     parser.add_argument("--no-report", action="store_true", help="Disable post-run report generation.")
+    parser.add_argument("--in-memory", action="store_true", help="Keep the ledger in RAM and write it to market.db once at shutdown.")
+    parser.add_argument("--agent-concurrency", type=int, default=8, help="Agents deciding (LLM calls in flight) at once per tick (1 = sequential).")
     return parser.parse_args()
 
 
@@ -182,16 +191,18 @@ def main():
     logging.info(f"Starting Agent Market Simulation | run_id={run_id}")
 
     # Initialize Market Engine
-    engine = MarketEngine("market.db", run_id=run_id, initial_price=args.initial_price)
+    engine = MarketEngine(MEMORY_DB if args.in_memory else DB_PATH, run_id=run_id, initial_price=args.initial_price)
     agents: List[Trader] = []
     
     # Initialize Agents with random personas
-    selected_personas = random.sample(PERSONAS, min(NUM_AGENTS, len(PERSONAS)))
+    # Sampling indexes draws the same personas as sampling PERSONAS itself
+    selected_indexes = random.sample(range(len(PERSONAS)), min(NUM_AGENTS, len(PERSONAS)))
     
-    for i, persona in enumerate(selected_personas):
+    for i, index in enumerate(selected_indexes):
         agent_id = f"Agent_{i+1}"
-        # Determine appropriate LLM for this persona
-        model = get_model_for_persona(persona)
+        persona = PERSONAS[index]
+        # Determine appropriate LLM for this persona (tier precomputed by index)
+        model = get_model_by_index(index)
         
         agent = Trader(agent_id=agent_id, persona=persona, model_name=model)
         if args.seed_inventory > 0:
@@ -210,6 +221,15 @@ def main():
     from src.agents.journalist import JournalistAgent
     journalist = JournalistAgent()  # Defaults to Gemini
 
+    # Agent decisions are network-bound LLM calls, so they run on a bounded
+    # thread pool; orders are still matched one at a time in acting order.
+    # https://github.com/python/cpython/blob/main/Doc/library/concurrent.futures.rst (Context7 /python/cpython)
+    executor = None
+    if args.agent_concurrency > 1:
+        # Load the shared memory embedder here, not lazily on a worker thread
+        warm_up_embedder()
+        executor = ThreadPoolExecutor(max_workers=args.agent_concurrency)
+
     # 2. Execution Loop
     with Live(layout, refresh_per_second=4, screen=True) as live:
         tick = 0
@@ -217,6 +237,8 @@ def main():
             while True:
                 tick += 1
                 start_time = time.time()
+                # One timestamp per tick, shared by every record produced in this tick
+                tick_ts = datetime.now(timezone.utc)
             
                 # --- MARKET TICK ---
                 market_state = engine.get_state()
@@ -228,25 +250,28 @@ def main():
                     news = journalist.analyze(market_state, recent_txns)
                     layout["news_flash"].update(Panel(f"[bold]{news.headline}[/bold]\n{news.body}", title="BREAKING NEWS", style="bold red"))
             
-                # Shuffle agents so they act in random order (fairness in sequential processing)
-                random.shuffle(agents)
+                # Random acting order each tick (fairness in sequential processing).
+                # sample() returns a new list, so `agents` keeps its order for the UI and reports.
+                acting_order = random.sample(agents, len(agents))  # https://github.com/python/cpython/blob/main/Doc/library/random.rst (Context7 /python/cpython)
+                # Interactions produced this tick; queued together once every agent has acted
+                tick_interactions: List[InteractionLog] = []
             
             # --- PHASE 2: THINK & ACT ---
-                for agent in agents:
-                    # Agent perceives state, retrieves memory, and decides
-                    decision = agent.act(market_state)
-                    
+                # Every agent perceives the same tick snapshot, retrieves memory, and decides
+                states = repeat(market_state)
+                decisions = executor.map(Trader.act, acting_order, states) if executor else map(Trader.act, acting_order, states)
+                for agent, decision in zip(acting_order, decisions):
                     if decision:
                         # Negotiate a counter-offer if quotes are far from the submitted price
-                        negotiated_price, negotiation_details = engine.negotiate_price(
+                        negotiated_price, negotiation = engine.negotiate_price(
                             agent_id=agent.id,
                             action=decision["action"],
                             item=decision["item"],
                             price=decision["price"],
                         )
-                        if negotiation_details:
+                        if negotiation:
                             decision["price"] = negotiated_price
-                            engine.ledger.record_interaction(InteractionLog(**negotiation_details))
+                            tick_interactions.append(negotiation.to_interaction(timestamp=tick_ts))
                             logging.info(
                                 f"NEGOTIATION: {agent.id} | ACTION: {decision['action'].value} | PRICE: {decision['price']}"
                             )
@@ -272,8 +297,9 @@ def main():
                         # --- PHASE 3: LOG & PERSIST ---
                         # Persist log to file
                         logging.info(f"AGENT: {agent.id} | ACTION: {decision['action'].value} | PRICE: {decision['price']} | REASON: {decision['reasoning']}")
-                        engine.ledger.record_interaction(
-                            InteractionLog(
+                        # Built from values this loop already holds; skip validation
+                        tick_interactions.append(
+                            InteractionLog.model_construct(
                                 run_id=run_id,
                                 agent_id=agent.id,
                                 kind="action",
@@ -281,11 +307,16 @@ def main():
                                 item=decision["item"],
                                 price=decision["price"],
                                 details=decision["reasoning"],
+                                timestamp=tick_ts,
                             )
                         )
                         if tx:
                             logging.info(f"  -> TRADE EXECUTED: {tx}")
 
+                engine.ledger.record_interactions(tick_interactions)
+                # Embed and store this tick's agent memories in one batch per agent
+                flush_memories(agent.memory for agent in agents)
+
                 # --- PHASE 4: VISUALIZE ---
                 # Update the UI components with the new state
                 layout["market_status"].update(create_market_table(engine.get_state()))
@@ -302,8 +333,8 @@ def main():
                         tick=tick,
                         market_state=market_state,
                         agents=agents,
-                        transactions=engine.ledger.get_transactions(limit=args.checkpoint_transactions),
-                        interactions=engine.ledger.get_interactions(limit=args.checkpoint_interactions),
+                        transactions=engine.ledger.iter_transactions(limit=args.checkpoint_transactions),
+                        interactions=engine.ledger.iter_interactions(limit=args.checkpoint_interactions),
                     )
                     filename = f"checkpoint_{tick:06d}.json"
                     path = write_checkpoint(payload, args.checkpoint_dir, filename)
@@ -313,10 +344,21 @@ def main():
                     logging.info(f"Simulation completed after {tick} ticks.")
                     break
         finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            # Commit any trades still queued in the ledger's background writer;
+            # a failed batch is logged so memories and the report still get written
+            try:
+                engine.ledger.flush()
+            except RuntimeError:
+                logging.exception("Ledger rows were lost during the run")
+            flush_memories(agent.memory for agent in agents)
+            if args.in_memory:
+                engine.ledger.dump(DB_PATH)
             if not args.no_report:
                 report_dir = generate_report(
                     run_id=run_id,
-                    db_path="market.db",
+                    db_path=DB_PATH,
                     report_root=args.report_dir,
                     agents=agents,
                     current_price=engine.last_price,
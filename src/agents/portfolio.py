@@ -4,10 +4,13 @@ Portfolio Management for Trading Agents.
 Tracks cash, positions, and calculates profit/loss metrics.
 """
 
-from typing import Dict
+from typing import Dict, Tuple
 import math
 from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
 
+# Capital that ROI is measured against (also the default starting cash)
+INITIAL_CAPITAL = 10000.0
+
 
 class Portfolio(BaseModel):
     """
@@ -21,13 +24,16 @@ class Portfolio(BaseModel):
     
     model_config = ConfigDict()  # Pydantic v2 config style per https://github.com/pydantic/pydantic/blob/main/docs/concepts/config.md (Context7 /pydantic/pydantic)
 
-    cash: float = Field(default=10000.0, description="Available cash balance")
+    cash: float = Field(default=INITIAL_CAPITAL, description="Available cash balance")
     positions: Dict[str, int] = Field(default_factory=dict, description="Holdings: {item: quantity}")
     realized_pnl: float = Field(default=0.0, description="Locked-in profit/loss from closed positions")
     trades_count: int = Field(default=0, description="Total number of trades executed")
     
     # Cost basis tracking for P/L calculation
     _cost_basis: Dict[str, float] = PrivateAttr(default_factory=dict)  # PrivateAttr per https://github.com/pydantic/pydantic/blob/main/docs/concepts/models.md (Context7 /pydantic/pydantic)
+    # Neumaier-compensated running sum behind realized_pnl (sum, compensation)
+    _pnl_sum: float = PrivateAttr(default=0.0)
+    _pnl_comp: float = PrivateAttr(default=0.0)
     
     def execute_buy(self, item: str, quantity: int, price: float) -> bool:
         """
@@ -74,22 +80,41 @@ class Portfolio(BaseModel):
         # Calculate realized P/L
         cost_basis = self._cost_basis.get(item, 0.0)
         pnl_this_trade = (price - cost_basis) * quantity
-        self.realized_pnl += pnl_this_trade
+        self._book_realized(pnl_this_trade)
         
         # Update cash
         self.cash += quantity * price
         
-        # Update positions
-        self.positions[item] = current_qty - quantity
-        if self.positions[item] == 0:
-            del self.positions[item]
-            if item in self._cost_basis:
-                del self._cost_basis[item]
+        # Update positions (one write, or one delete when the position closes)
+        remaining = current_qty - quantity
+        if remaining:
+            self.positions[item] = remaining
+        else:
+            self.positions.pop(item, None)
+            self._cost_basis.pop(item, None)
         
         self.trades_count += 1
         
         return True
     
+    def _book_realized(self, pnl: float) -> None:
+        """
+        Add to realized P/L with Neumaier compensation, so many small fills do
+        not accumulate rounding error.
+        """
+        total = self._pnl_sum
+        if total + self._pnl_comp != self.realized_pnl:
+            # realized_pnl was set directly (or at construction); restart from it
+            total = self.realized_pnl
+            self._pnl_comp = 0.0
+        new_total = total + pnl
+        if abs(total) >= abs(pnl):
+            self._pnl_comp += (total - new_total) + pnl
+        else:
+            self._pnl_comp += (pnl - new_total) + total
+        self._pnl_sum = new_total
+        self.realized_pnl = new_total + self._pnl_comp
+
     def get_unrealized_pnl(self, current_prices: Dict[str, float]) -> float:
         """
         Calculate unrealized P/L based on current market prices.
@@ -117,21 +142,38 @@ class Portfolio(BaseModel):
         )
         return self.cash + position_value
     
+    def _aggregate(self, current_prices: Dict[str, float]) -> Tuple[float, float]:
+        """
+        Unrealized P/L and market value of positions in one pass, looking each
+        price up once. Matches `get_unrealized_pnl` and `get_portfolio_value`.
+        """
+        cost_basis = self._cost_basis
+        unrealized = 0.0
+        position_value = 0
+        for item, qty in self.positions.items():
+            basis = cost_basis.get(item, 0.0)
+            market_price = current_prices.get(item)
+            if market_price is None:
+                continue  # Unquoted items: valued at cost for P/L, at 0 for value
+            unrealized += (market_price - basis) * qty
+            position_value += qty * market_price
+        return unrealized, position_value
+
     def get_metrics(self, current_prices: Dict[str, float]) -> dict:
         """
         Return performance metrics for analytics.
         """
-        total_pnl = self.get_total_pnl(current_prices)
-        initial_capital = 10000.0
+        unrealized, position_value = self._aggregate(current_prices)
+        total_pnl = self.realized_pnl + unrealized
         
         return {
             "cash": self.cash,
             "positions": dict(self.positions),
             "realized_pnl": self.realized_pnl,
-            "unrealized_pnl": self.get_unrealized_pnl(current_prices),
+            "unrealized_pnl": unrealized,
             "total_pnl": total_pnl,
-            "portfolio_value": self.get_portfolio_value(current_prices),
-            "roi": (total_pnl / initial_capital) * 100 if initial_capital > 0 else 0.0,
+            "portfolio_value": self.cash + position_value,
+            "roi": (total_pnl / INITIAL_CAPITAL) * 100,
             "trades_count": self.trades_count
         }
 
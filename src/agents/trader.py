@@ -20,6 +20,10 @@ from src.market.schema import MarketState, AgentAction, DEFAULT_ITEM
 
 litellm.enable_json_schema_validation = True
 
+# Decision action string -> AgentAction, so each decision costs one dict lookup
+# instead of an Enum value lookup. https://github.com/python/cpython/blob/main/Doc/howto/enum.rst (Context7 /python/cpython)
+_ACTION_MAP = {action.value: action for action in AgentAction}
+
 def _parse_structured_response(model_cls: type[BaseModel], content):
     if isinstance(content, model_cls):
         return content
@@ -68,6 +72,14 @@ class Trader(BaseAgent):
         """
         super().__init__(agent_id, persona)
         self.model_name = model_name
+        # The identity part of the system prompt never changes for an agent,
+        # so it is built once; act() only formats the per-tick market section.
+        self._prompt_preamble = (
+            "You are a trading agent in a market simulation.\n"
+            f"Your ID: {self.id}\n"
+            f"Your Persona: {self.persona}\n"
+            f"{self._get_persona_constraints()}\n"
+        )
     
     def _get_persona_constraints(self) -> str:
         """
@@ -122,21 +134,16 @@ class Trader(BaseAgent):
         recent_memories = self.memory.retrieve_memory("trading decision", n_results=3)
         memory_context = "\n".join(recent_memories) if recent_memories else "No past trades recorded."
 
-        # 3. Get persona-specific constraints
-        constraints = self._get_persona_constraints()
-
-        # 4. Construct enhanced system prompt
-        system_prompt = f"""You are a trading agent in a market simulation.
-Your ID: {self.id}
-Your Persona: {self.persona}
-{constraints}
-
+        # 3. Construct enhanced system prompt: cached persona preamble (with
+        # persona-specific constraints) + this tick's market and portfolio data
+        summary = market_state.order_book_summary
+        system_prompt = self._prompt_preamble + f"""
 Current Market State:
 - Price: ${market_state.current_price:.2f}
-- Best Bid: {market_state.order_book_summary.get('best_bid', 'N/A')}
-- Best Ask: {market_state.order_book_summary.get('best_ask', 'N/A')}
-- Buy Orders: {market_state.order_book_summary.get('bids_count', 0)}
-- Sell Orders: {market_state.order_book_summary.get('asks_count', 0)}
+- Best Bid: {summary.get('best_bid', 'N/A')}
+- Best Ask: {summary.get('best_ask', 'N/A')}
+- Buy Orders: {summary.get('bids_count', 0)}
+- Sell Orders: {summary.get('asks_count', 0)}
 
 Your Portfolio:
 - Cash: ${portfolio_metrics['cash']:.2f}
@@ -179,7 +186,7 @@ Decide: BUY, SELL, HOLD, or REFLECTION (internal thought only).
             self.remember(f"Decided to {decision.action} at {decision.price}: {decision.reasoning}")
 
             # Convert string action to internal Enum
-            action_enum = AgentAction(decision.action)
+            action_enum = _ACTION_MAP[decision.action]
             
             return {
                 "action": action_enum,
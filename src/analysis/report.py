@@ -4,48 +4,142 @@ Post-run report generation for marketplace simulations.
 
 from __future__ import annotations
 
-from typing import Any, Iterable, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
 import argparse
 import json
+import math
 import os
 from datetime import datetime, timezone
 
-import pandas as pd
-import matplotlib.pyplot as plt
+from sqlalchemy import func, inspect
 from sqlmodel import Session, create_engine, select
 
-from src.market.schema import Transaction, InteractionLog, DEFAULT_ITEM
+from src.market.schema import Transaction, InteractionLog, RunStats, AgentTradeCount, DEFAULT_ITEM
 
+if TYPE_CHECKING:
+    # pandas/matplotlib are imported lazily so empty runs and index-only
+    # invocations never pay their import cost.
+    import pandas as pd
 
-def _to_dataframe(items: Iterable[Any]) -> pd.DataFrame:
+LOAD_CHUNK_SIZE = 1000  # Rows fetched per round-trip when streaming report data
+MAX_PLOT_POINTS = 2000  # Trades drawn in the price chart; longer runs are downsampled
+
+# Only the columns the report reads are selected from the ledger.
+TX_COLUMNS = ("timestamp", "price", "buyer_id", "seller_id")
+PRICE_COLUMNS = ("timestamp", "price")
+INTERACTION_COLUMNS = ("agent_id", "kind")
+
+
+def _collect_columns(rows: Iterable[tuple], columns: tuple[str, ...]) -> dict[str, list]:
     """
-    Convert a list of SQLModel/Pydantic objects into a DataFrame.
+    Collect an iterable of result tuples into a dict of column lists.
+
+    The iterable is consumed exactly once, so streamed query results never
+    need an intermediate list of ORM objects. The result can be handed to
+    `pd.DataFrame` as-is.
     """
-    data = [item.model_dump(mode="json") for item in items]  # https://docs.pydantic.dev/latest/api/base_model (Context7 /websites/pydantic_dev)
-    return pd.DataFrame(data)  # https://pandas.pydata.org/docs/user_guide/dsintro (Context7 /websites/pandas_pydata)
+    data: dict[str, list] = {name: [] for name in columns}
+    appenders = [data[name].append for name in columns]
+    for row in rows:
+        for append, value in zip(appenders, row):
+            append(value)
+    return data
 
 
-def _load_transactions(db_path: str, run_id: Optional[str]) -> list[Transaction]:
-    engine = create_engine(f"sqlite:///{db_path}")
-    with Session(engine) as session:
-        statement = select(Transaction)
-        if run_id:
-            statement = statement.where(Transaction.run_id == run_id)
-        statement = statement.order_by(Transaction.timestamp.asc())
-        return list(session.exec(statement).all())
+def _load_transactions(session: Session, run_id: Optional[str]) -> Iterator[tuple]:
+    """
+    Stream the transaction columns used by the report, in timestamp order.
 
+    Yields tuples matching `TX_COLUMNS`. Rows are fetched in chunks of
+    `LOAD_CHUNK_SIZE`; the caller must keep the session open until the
+    iterator is exhausted.
+    """
+    statement = select(Transaction.timestamp, Transaction.price, Transaction.buyer_id, Transaction.seller_id)
+    if run_id:
+        statement = statement.where(Transaction.run_id == run_id)
+    statement = statement.order_by(Transaction.timestamp.asc())
+    return iter(session.exec(statement.execution_options(yield_per=LOAD_CHUNK_SIZE)))  # https://docs.sqlalchemy.org/en/20/orm/queryguide/api.html#fetching-large-result-sets-with-yield-per
 
-def _load_interactions(db_path: str, run_id: Optional[str]) -> list[InteractionLog]:
-    engine = create_engine(f"sqlite:///{db_path}")
-    with Session(engine) as session:
-        statement = select(InteractionLog)
-        if run_id:
-            statement = statement.where(InteractionLog.run_id == run_id)
-        statement = statement.order_by(InteractionLog.timestamp.asc())
-        return list(session.exec(statement).all())
+
+def _load_price_series(session: Session, run_id: str, trade_count: int) -> Iterator[tuple]:
+    """
+    Stream at most about `MAX_PLOT_POINTS` (timestamp, price) tuples for the
+    price chart, in timestamp order.
+
+    Runs with more trades keep every n-th trade. Sampling happens in SQLite
+    (ROW_NUMBER window), so only the plotted rows reach Python.
+    """
+    stride = max(1, math.ceil(trade_count / MAX_PLOT_POINTS))
+    if stride == 1:
+        statement = (
+            select(Transaction.timestamp, Transaction.price)
+            .where(Transaction.run_id == run_id)
+            .order_by(Transaction.timestamp.asc())
+        )
+    else:
+        numbered = (
+            select(
+                Transaction.timestamp,
+                Transaction.price,
+                func.row_number().over(order_by=Transaction.timestamp.asc()).label("position"),
+            )
+            .where(Transaction.run_id == run_id)
+            .subquery()
+        )  # https://docs.sqlalchemy.org/en/20/tutorial/data_select.html#using-window-functions
+        statement = (
+            select(numbered.c.timestamp, numbered.c.price)
+            .where((numbered.c.position - 1) % stride == 0)
+            .order_by(numbered.c.position)
+        )
+    return iter(session.exec(statement.execution_options(yield_per=LOAD_CHUNK_SIZE)))
+
+
+def _load_interactions(session: Session, run_id: Optional[str]) -> Iterator[tuple]:
+    """
+    Stream the interaction columns used by the report (see `INTERACTION_COLUMNS`).
+    """
+    statement = select(InteractionLog.agent_id, InteractionLog.kind)
+    if run_id:
+        statement = statement.where(InteractionLog.run_id == run_id)
+    statement = statement.order_by(InteractionLog.timestamp.asc())
+    return iter(session.exec(statement.execution_options(yield_per=LOAD_CHUNK_SIZE)))
+
+
+def _has_table(session: Session, model: Any) -> bool:
+    """
+    Whether the database has the model's table. Files written before RunStats
+    and AgentTradeCount existed lack them, and the report never creates tables.
+    """
+    return inspect(session.connection()).has_table(model.__tablename__)  # https://docs.sqlalchemy.org/en/20/core/reflection.html#sqlalchemy.engine.reflection.Inspector.has_table
+
+
+def _load_run_stats(session: Session, run_id: str) -> Optional[RunStats]:
+    """
+    Fetch the incrementally maintained aggregates for a run (None for legacy runs).
+    """
+    if not _has_table(session, RunStats):
+        return None
+    return session.get(RunStats, run_id)
+
+
+def _load_agent_trade_counts(session: Session, run_id: str) -> list[tuple]:
+    """
+    Fetch per-agent trade counts for a run as (agent_id, trade_count) tuples
+    (empty for legacy runs).
+    """
+    if not _has_table(session, AgentTradeCount):
+        return []
+    statement = (
+        select(AgentTradeCount.agent_id, AgentTradeCount.trade_count)
+        .where(AgentTradeCount.run_id == run_id)
+        .order_by(AgentTradeCount.trade_count.desc(), AgentTradeCount.agent_id)
+    )
+    return list(session.exec(statement).all())
 
 
 def _write_plot(path: str, fig) -> None:
+    import matplotlib.pyplot as plt
+
     fig.savefig(path, dpi=200, bbox_inches="tight")  # https://github.com/matplotlib/matplotlib/blob/main/galleries/users_explain/figure/figure_intro.rst (Context7 /matplotlib/matplotlib)
     plt.close(fig)
 
@@ -60,7 +154,22 @@ def _markdown_table(df: pd.DataFrame, columns: list[str]) -> str:
     return "\n".join([headers, divider, *rows])
 
 
+def _markdown_records(records: list[dict], columns: list[str]) -> str:
+    """
+    Render a list of dicts as a markdown table without going through pandas.
+    """
+    headers = " | ".join(columns)
+    divider = " | ".join(["---"] * len(columns))
+    rows = [
+        " | ".join("" if record.get(column) is None else str(record.get(column)) for column in columns)
+        for record in records
+    ]
+    return "\n".join([headers, divider, *rows])
+
+
 def _build_agent_summary(agents: Iterable[Any], current_price: float) -> pd.DataFrame:
+    import pandas as pd
+
     rows = []
     for agent in agents:
         metrics = agent.portfolio.get_metrics({DEFAULT_ITEM: current_price})
@@ -82,7 +191,13 @@ def _build_agent_summary(agents: Iterable[Any], current_price: float) -> pd.Data
     return df
 
 
-def _build_trade_activity(tx_df: pd.DataFrame) -> pd.DataFrame:
+def _count_trades(tx_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-agent trade counts from a full trade scan, for runs recorded before
+    `AgentTradeCount` was maintained.
+    """
+    import pandas as pd
+
     if tx_df.empty:
         return pd.DataFrame(columns=["agent_id", "trade_count"])
     buyers = tx_df["buyer_id"].value_counts().rename("trade_count")
@@ -93,6 +208,8 @@ def _build_trade_activity(tx_df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _build_action_activity(interactions_df: pd.DataFrame) -> pd.DataFrame:
+    import pandas as pd
+
     if interactions_df.empty:
         return pd.DataFrame(columns=["agent_id", "action_count"])
     actions = interactions_df[interactions_df["kind"] == "action"]
@@ -103,7 +220,24 @@ def _build_action_activity(interactions_df: pd.DataFrame) -> pd.DataFrame:
     return counts
 
 
-def _summarize_market(tx_df: pd.DataFrame) -> dict:
+def _summarize_run_stats(stats: RunStats) -> dict:
+    n = stats.trade_count
+    mean = stats.price_sum / n
+    # Sample standard deviation from running sums, matching pandas' ddof=1.
+    volatility = math.sqrt(max(stats.price_sumsq - stats.price_sum * mean, 0.0) / (n - 1)) if n > 1 else math.nan
+    return {
+        "total_trades": n,
+        "avg_price": mean,
+        "min_price": stats.price_min,
+        "max_price": stats.price_max,
+        "volatility": volatility,
+    }
+
+
+def _summarize_trades(tx_df: pd.DataFrame) -> dict:
+    """
+    Market summary from a full trade scan, for runs without `RunStats`.
+    """
     if tx_df.empty:
         return {
             "total_trades": 0,
@@ -138,23 +272,42 @@ def generate_report(
     report_dir = os.path.join(report_root, run_id)
     _ensure_dir(report_dir)
 
-    transactions = _load_transactions(db_path, run_id)
-    interactions = _load_interactions(db_path, run_id)
-
-    tx_df = _to_dataframe(transactions)
-    interactions_df = _to_dataframe(interactions)
+    agents = list(agents)
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine) as session:
+        run_stats = _load_run_stats(session, run_id)
+        if run_stats is not None:
+            # Totals and per-agent counts come from the aggregates; only the
+            # (downsampled) price series is read from the trades themselves.
+            trade_counts = _load_agent_trade_counts(session, run_id)
+            tx_columns = _collect_columns(_load_price_series(session, run_id, run_stats.trade_count), PRICE_COLUMNS)
+        else:
+            # Runs recorded before RunStats existed: scan the trades.
+            tx_columns = _collect_columns(_load_transactions(session, run_id), TX_COLUMNS)
+        interaction_columns = _collect_columns(_load_interactions(session, run_id), INTERACTION_COLUMNS)
+
+    if run_stats is None and not tx_columns["price"] and not interaction_columns["agent_id"] and not agents:
+        return _write_empty_report(run_id, report_root, report_dir)
+
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
+    tx_df = pd.DataFrame(tx_columns)  # https://pandas.pydata.org/docs/user_guide/dsintro (Context7 /websites/pandas_pydata)
+    interactions_df = pd.DataFrame(interaction_columns)
 
     agent_df = _build_agent_summary(agents, current_price)
-    trade_activity_df = _build_trade_activity(tx_df)
+    if run_stats is not None:
+        trade_activity_df = pd.DataFrame(trade_counts, columns=["agent_id", "trade_count"])
+        market_summary = _summarize_run_stats(run_stats)
+    else:
+        trade_activity_df = _count_trades(tx_df)
+        market_summary = _summarize_trades(tx_df)
     action_activity_df = _build_action_activity(interactions_df)
-    market_summary = _summarize_market(tx_df)
 
     plot_paths = {}
-    if transactions:
+    if not tx_df.empty:
         fig, ax = plt.subplots(figsize=(10, 4))
-        times = [tx.timestamp for tx in transactions]
-        prices = [tx.price for tx in transactions]
-        ax.plot(times, prices, label="Trade Price")
+        ax.plot(tx_df["timestamp"], tx_df["price"], label="Trade Price")
         ax.set_title("Price Over Time")
         ax.set_xlabel("Time")
         ax.set_ylabel("Price")
@@ -232,6 +385,28 @@ def generate_report(
         report_lines.append(f"- Negotiation events: {negotiation_count}")
         report_lines.append("")
 
+    _write_report(run_id, report_root, report_dir, report_lines, market_summary["total_trades"], top_agent, top_roi)
+    return report_dir
+
+
+def _write_empty_report(run_id: str, report_root: str, report_dir: str) -> str:
+    """
+    Write the placeholder report for a run with no trades, interactions, or agents.
+    """
+    report_lines = [f"# Run Report: {run_id}", "", "No data recorded for this run.", ""]
+    _write_report(run_id, report_root, report_dir, report_lines, 0, None, None)
+    return report_dir
+
+
+def _write_report(
+    run_id: str,
+    report_root: str,
+    report_dir: str,
+    report_lines: list[str],
+    total_trades: int,
+    top_agent: Optional[str],
+    top_roi: Optional[float],
+) -> None:
     report_path = os.path.join(report_dir, "report.md")
     with open(report_path, "w", encoding="utf-8") as handle:
         handle.write("\n".join(report_lines))
@@ -239,13 +414,12 @@ def generate_report(
     summary = {
         "run_id": run_id,
         "generated_at": datetime.now(timezone.utc).isoformat(),  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
-        "total_trades": market_summary["total_trades"],
+        "total_trades": total_trades,
         "top_agent": top_agent,
         "top_roi": top_roi,
         "report_path": os.path.relpath(report_path, report_root),
     }
     _update_index(report_root, summary)
-    return report_dir
 
 
 def _update_index(report_root: str, summary: dict) -> None:
@@ -262,8 +436,7 @@ def _update_index(report_root: str, summary: dict) -> None:
 
     index_lines = ["# Reports Index", ""]
     if entries:
-        df = pd.DataFrame(entries)  # https://pandas.pydata.org/docs/user_guide/dsintro (Context7 /websites/pandas_pydata)
-        index_lines.append(_markdown_table(df, ["run_id", "total_trades", "top_agent", "top_roi", "report_path"]))
+        index_lines.append(_markdown_records(entries, ["run_id", "total_trades", "top_agent", "top_roi", "report_path"]))
     else:
         index_lines.append("No reports found.")
 
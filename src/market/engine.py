@@ -12,14 +12,27 @@ Responsibilities:
 4. Expose market state to agents.
 """
 
-from typing import List, Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 import math
-import math
-from datetime import datetime
+import sys
 
 from .ledger import Ledger
 from .order_book import OrderBook
-from .schema import Transaction, AgentAction, MarketState, DEFAULT_ITEM
+from .schema import Transaction, AgentAction, MarketState, NegotiationEvent, DEFAULT_ITEM, MAX_PRICE, to_ticks, from_ticks
+
+# Hoisted once at import so price validation on the per-action hot path does
+# not rebuild the type tuple or resolve `math.isfinite` on every call.
+_PRICE_TYPES = (int, float)
+_isfinite = math.isfinite
+_MAX_PRICE = MAX_PRICE
+
+# Enum members are singletons, so negotiation compares by identity instead of
+# going through str.__eq__. AgentAction is a str enum, so raw "buy"/"sell"
+# values hash equal to the members and the lookup normalizes them once.
+# https://github.com/python/cpython/blob/main/Doc/howto/enum.rst (Context7 /python/cpython)
+_BUY = AgentAction.BUY
+_SELL = AgentAction.SELL
+_NEGOTIABLE = {_BUY: _BUY, _SELL: _SELL}
 
 class MarketEngine:
     """
@@ -31,6 +44,10 @@ class MarketEngine:
         last_price (float): The price of the most recent execution. Used as the "current market price".
     """
 
+    # Fixed attribute layout: faster attribute access and no per-instance __dict__.
+    # https://github.com/python/cpython/blob/main/Doc/reference/datamodel.rst (Context7 /python/cpython)
+    __slots__ = ("ledger", "order_book", "last_price", "run_id", "_state_cache", "_dispatch")
+
     def __init__(
         self,
         db_path: str = "market.db",
@@ -45,25 +62,39 @@ class MarketEngine:
         """
         self.ledger = Ledger(db_path)
         self.order_book = OrderBook()
-        if not isinstance(initial_price, (int, float)) or not math.isfinite(initial_price) or initial_price <= 0:
+        if not isinstance(initial_price, _PRICE_TYPES) or not _isfinite(initial_price) or initial_price <= 0:
             initial_price = 100.0  # Guard against invalid seeds per https://github.com/python/cpython/blob/main/Doc/library/math.rst (Context7 /python/cpython)
         self.last_price = float(initial_price)
         self.run_id = run_id
+        # ((book version, last price), MarketState) for the most recent get_state()
+        self._state_cache: Optional[tuple] = None
+        # Action -> specialized handler; built once so process_action branches only once
+        self._dispatch: Dict[AgentAction, Callable[[Any, str, float], Optional[Transaction]]] = {
+            _BUY: self._execute_buy,
+            _SELL: self._execute_sell,
+        }
 
     def get_state(self) -> MarketState:
         """
         Constructs and returns the current state of the market.
         
-        This is the "sensor" data provided to agents.
+        This is the "sensor" data provided to agents. The result is cached and
+        reused until the order book or the last price changes, so callers must
+        treat it as read-only.
         
         Returns:
             MarketState: Object containing price and order book summary.
         """
-        summary = self.order_book.get_summary()
-        return MarketState(
+        key = (self.order_book.version, self.last_price)
+        cached = self._state_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        state = MarketState(
             current_price=self.last_price,
-            order_book_summary=summary
+            order_book_summary=self.order_book.get_summary()
         )
+        self._state_cache = (key, state)
+        return state
 
     def process_action(self, agent: Any, action: AgentAction, item: str = DEFAULT_ITEM, price: float = 0.0) -> Optional[Transaction]:
         """
@@ -85,102 +116,118 @@ class MarketEngine:
         Returns:
             Optional[Transaction]: The resulting transaction if a trade occurred, else None.
         """
-        transaction = None
-        
-        # HOLD or REFLECTION actions have no market impact
-        if action in (AgentAction.HOLD, AgentAction.REFLECTION):
+        # One table lookup picks the handler. AgentAction is a str enum, so raw
+        # values ("buy") hash to the same key. HOLD, REFLECTION and unknown
+        # actions have no handler and no market impact.
+        execute = self._dispatch.get(action)
+        if execute is None:
             return None
 
-        if not isinstance(item, str) or not item.strip():
+        if type(item) is str:
+            # Items decoded from LLM output are fresh strings; interning lets the
+            # order book's last-item identity check and the portfolio's dict
+            # lookups hit their pointer-equality fast path.
+            # https://github.com/python/cpython/blob/main/Doc/library/sys.rst (Context7 /python/cpython)
+            item = sys.intern(item)
+        elif not isinstance(item, str):
+            return None
+        if not item.strip():
             return None
 
-        if not isinstance(price, (int, float)) or not math.isfinite(price) or price <= 0:
+        # Exact floats (the common case) skip isinstance; NaN fails every
+        # comparison, so one chained compare rejects NaN, <= 0, +inf and
+        # finite prices too large to convert to ticks.
+        if type(price) is not float and not isinstance(price, _PRICE_TYPES):
+            return None
+        if not 0.0 < price < _MAX_PRICE:
+            return None
+        # Positive prices below half a tick round to zero ticks and would
+        # otherwise rest and trade at 0.0.
+        if to_ticks(price) <= 0:
             return None
 
-        # Route action to the appropriate OrderBook method
-        if action == AgentAction.BUY:
-            transaction = self.order_book.add_buy(agent.id, item, float(price))
-            
-            # If trade matched, execute against portfolio
-            if transaction:
-                # Portfolio validation: Check if agent has enough cash
-                success = agent.portfolio.execute_buy(
-                    item=transaction.item,
-                    quantity=1,  # TODO: Support variable quantities
-                    price=transaction.price
-                )
-                
-                if not success:
-                    # Rollback: Insufficient funds, cancel the trade
-                    # In a real system we'd need to put the order back on the book
-                    return None
-                    
-        elif action == AgentAction.SELL:
-            transaction = self.order_book.add_sell(agent.id, item, float(price))
-            
-            # If trade matched, execute against portfolio
-            if transaction:
-                # Portfolio validation: Check if agent has the asset
-                success = agent.portfolio.execute_sell(
-                    item=transaction.item,
-                    quantity=1,
-                    price=transaction.price
-                )
-                
-                if not success:
-                    # Rollback: Insufficient inventory
-                    return None
-        else:
+        return execute(agent, item, float(price))
+
+    def _execute_buy(self, agent: Any, item: str, price: float) -> Optional[Transaction]:
+        """
+        Routes a validated BUY order to the book and settles any match.
+        """
+        transaction = self.order_book.add_buy(agent.id, item, price)
+        if transaction is None:
             return None
 
-        # If the order resulted in a trade AND portfolio execution succeeded
-        if transaction:
-            if self.run_id:
-                transaction.run_id = self.run_id
-            # 1. Persist to DB
-            self.ledger.record_transaction(transaction)
-            
-            # 2. Update Market State
-            self.last_price = transaction.price
-            
-            return transaction
-        
-        return None
+        # Portfolio validation: Check if agent has enough cash
+        success = agent.portfolio.execute_buy(
+            item=transaction.item,
+            quantity=1,  # TODO: Support variable quantities
+            price=transaction.price
+        )
+        if not success:
+            # Rollback: Insufficient funds, cancel the trade
+            # In a real system we'd need to put the order back on the book
+            return None
+        return self._record(transaction)
 
-    def negotiate_price(self, agent_id: str, action: AgentAction, item: str, price: float) -> tuple[float, Optional[dict]]:
+    def _execute_sell(self, agent: Any, item: str, price: float) -> Optional[Transaction]:
+        """
+        Routes a validated SELL order to the book and settles any match.
+        """
+        transaction = self.order_book.add_sell(agent.id, item, price)
+        if transaction is None:
+            return None
+
+        # Portfolio validation: Check if agent has the asset
+        success = agent.portfolio.execute_sell(
+            item=transaction.item,
+            quantity=1,
+            price=transaction.price
+        )
+        if not success:
+            # Rollback: Insufficient inventory
+            return None
+        return self._record(transaction)
+
+    def _record(self, transaction: Transaction) -> Transaction:
+        """
+        Persists a settled trade and updates the market state.
+        """
+        run_id = self.run_id
+        if run_id:
+            transaction.run_id = run_id
+        # 1. Persist to DB
+        self.ledger.record_transaction(transaction)
+        # 2. Update Market State
+        self.last_price = transaction.price
+        return transaction
+
+    def negotiate_price(self, agent_id: str, action: AgentAction, item: str, price: float) -> tuple[float, Optional[NegotiationEvent]]:
         """
         Provides a counter-offer price based on current best quotes.
+
+        Returns:
+            tuple: The price to submit and, if a counter-offer was made, a
+                   `NegotiationEvent` describing it (otherwise None).
         """
-        best_bid, best_ask = self.order_book.get_best_quotes(item)
-
-        if action == AgentAction.BUY and best_ask is not None and price < best_ask:
-            counter_price = (price + best_ask) / 2.0
-            details = {
-                "kind": "negotiation",
-                "agent_id": agent_id,
-                "counterparty_id": None,
-                "action": action.value,
-                "item": item,
-                "price": counter_price,
-                "details": f"Counter-offer between bid {price} and ask {best_ask}.",
-            }
-            if self.run_id:
-                details["run_id"] = self.run_id
-            return counter_price, details
-
-        if action == AgentAction.SELL and best_bid is not None and price > best_bid:
-            counter_price = (price + best_bid) / 2.0
-            details = {
-                "kind": "negotiation",
-                "agent_id": agent_id,
-                "counterparty_id": None,
-                "action": action.value,
-                "item": item,
-                "price": counter_price,
-                "details": f"Counter-offer between ask {price} and bid {best_bid}.",
-            }
-            if self.run_id:
-                details["run_id"] = self.run_id
-            return counter_price, details
+        # Only orders negotiate, and only prices that have a tick value: HOLD
+        # and REFLECTION decisions may carry NaN/inf, which to_ticks rejects.
+        action = _NEGOTIABLE.get(action)
+        if action is None or not abs(price) < _MAX_PRICE:
+            return price, None
+
+        # Midpoints are taken in integer ticks; floats only at the boundary
+        best_bid, best_ask = self.order_book.get_best_quote_ticks(item)
+        ticks = to_ticks(price)
+
+        if action is _BUY and best_ask is not None and ticks < best_ask:
+            counter_price = from_ticks((ticks + best_ask) >> 1)
+            return counter_price, NegotiationEvent(
+                agent_id, action, item, counter_price, price, from_ticks(best_ask), self.run_id
+            )
+
+        if action is _SELL and best_bid is not None and ticks > best_bid:
+            counter_price = from_ticks((ticks + best_bid) >> 1)
+            return counter_price, NegotiationEvent(
+                agent_id, action, item, counter_price, price, from_ticks(best_bid), self.run_id
+            )
 
         return price, None
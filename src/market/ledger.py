@@ -3,14 +3,595 @@ Market Ledger (Persistence Layer).
 
 This module handles the permanent storage of market transactions using SQLModel.
 It abstracts the database connection and session management.
+
+Transactions and interaction logs are written behind the simulation loop:
+`record_transaction` / `record_interaction` only enqueue the row, and a
+background writer thread commits queued rows in batches on a single persistent
+connection (WAL journal, `synchronous=NORMAL`). Reads flush the queue first, so
+callers always see their own writes.
 """
 
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter
+from datetime import datetime, timezone
+import atexit
+import functools
+import itertools
 import logging
+import queue
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import QueuePool, StaticPool
 from sqlmodel import SQLModel, Session, create_engine, select
 import os
+import pathlib
 import sqlite3
-from .schema import Transaction, InteractionLog
+from .schema import Transaction, InteractionLog, RunStats, AgentTradeCount
+
+# Rows built with `model_construct` (reader results, the main loop's interaction
+# logs) carry no ORM instance state, so their attribute access needs the
+# mappers configured up front rather than on the first validated instance.
+configure_mappers()  # https://docs.sqlalchemy.org/en/20/orm/mapping_api.html (Context7 /websites/sqlalchemy_en_20)
+
+# Applied to every connection on a ledger file: the writer's persistent
+# connection and each pooled reader connection. WAL lets readers proceed while
+# a batch commits; NORMAL sync is durable across app crashes under WAL.
+# https://www.sqlite.org/pragma.html
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",      # 64 MiB page cache (negative = KiB)
+    "PRAGMA mmap_size=268435456",    # 256 MiB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+)
+
+WRITE_BATCH_SIZE = 512       # Max rows committed per batch
+WRITE_FLUSH_INTERVAL = 0.05  # Max seconds a queued row waits for its batch
+READ_CHUNK_SIZE = 256        # Rows fetched per round-trip by the iter_* readers
+
+_STOP = object()  # Queue marker: commit the pending batch and end the writer thread
+_FLUSH_POLL_INTERVAL = 0.5  # Seconds between writer liveness checks while flush() waits
+_ID_RETRIES = 3  # Times a batch is renumbered after colliding with another writer's IDs
+
+MEMORY_DB = ":memory:"  # db_path for ephemeral runs; see `Ledger.dump`
+
+# Queue items are (kind, row, model) triples; model is the recorded instance
+# whose `id` mirrors row[0], or None for rows that have no caller-held object.
+_TRANSACTION = 0
+_INTERACTION = 1
+
+# The writer bypasses the ORM; SQLModel is only used to create the tables.
+# Queued rows are tuples in exactly these column orders.
+_TRANSACTION_COLUMNS = ("id", "run_id", "buyer_id", "seller_id", "item", "price", "timestamp")
+_INTERACTION_COLUMNS = (
+    "id", "run_id", "agent_id", "kind", "action", "item", "price", "counterparty_id", "details", "timestamp",
+)
+
+# Bumped whenever `_migrate_schema` gains a step; stored in PRAGMA user_version.
+SCHEMA_VERSION = 3
+
+# Bound parameters per statement for multi-row INSERTs. SQLite builds before
+# 3.32 cap host parameters at 999. https://www.sqlite.org/limits.html
+SQLITE_MAX_PARAMS = 999
+_UPSERT_RUN_STATS_SQL = (
+    f'INSERT INTO "{RunStats.__tablename__}" (run_id, trade_count, price_sum, price_sumsq, price_min, price_max) '
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(run_id) DO UPDATE SET "
+    "trade_count = trade_count + excluded.trade_count, "
+    "price_sum = price_sum + excluded.price_sum, "
+    "price_sumsq = price_sumsq + excluded.price_sumsq, "
+    "price_min = min(price_min, excluded.price_min), "
+    "price_max = max(price_max, excluded.price_max)"
+)  # https://www.sqlite.org/lang_upsert.html
+_UPSERT_AGENT_COUNT_SQL = (
+    f'INSERT INTO "{AgentTradeCount.__tablename__}" (run_id, agent_id, trade_count) VALUES (?, ?, ?) '
+    "ON CONFLICT(run_id, agent_id) DO UPDATE SET trade_count = trade_count + excluded.trade_count"
+)
+
+
+# (datetime, text) of the last timestamp formatted. Every row of a tick shares
+# one datetime object, so an identity check usually skips the formatting.
+_last_formatted: Tuple[Optional[datetime], str] = (None, "")
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    """
+    Format a datetime the way SQLAlchemy's SQLite DateTime type stores it
+    (wall-clock time, always with microseconds, no offset).
+    """
+    global _last_formatted
+    last = _last_formatted
+    if value is last[0]:
+        return last[1]
+    # isoformat is several times cheaper than the equivalent strftime pattern
+    text = value.replace(tzinfo=None).isoformat(" ", "microseconds")  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
+    _last_formatted = (value, text)
+    return text
+
+
+def _parse_sqlite_datetime(value: str) -> datetime:
+    """
+    Parse a stored timestamp back to an aware UTC datetime, as the ORM returns it.
+    """
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+@functools.lru_cache(maxsize=None)
+def _multi_insert_sql(table: str, columns: Tuple[str, ...], rows: int) -> str:
+    """
+    Build (and cache) an `INSERT ... VALUES (...), (...)` statement for `rows` rows.
+    """
+    placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+    return f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ' + ", ".join([placeholders] * rows)
+
+
+def _insert_rows(conn: sqlite3.Connection, table: str, columns: Tuple[str, ...], rows: List[tuple]) -> None:
+    """
+    Insert rows with as few multi-row statements as the parameter limit allows.
+    """
+    chunk = max(1, SQLITE_MAX_PARAMS // len(columns))
+    flatten = itertools.chain.from_iterable
+    for start in range(0, len(rows), chunk):
+        part = rows[start:start + chunk]
+        conn.execute(_multi_insert_sql(table, columns, len(part)), tuple(flatten(part)))
+
+
+def _interaction_row(interaction: InteractionLog, row_id: int) -> tuple:
+    """
+    Assign `row_id` to the interaction and return its queued row (`_INTERACTION_COLUMNS` order).
+    """
+    # Written to the instance dict directly: `model_construct` instances have no
+    # ORM state for an instrumented set, and these rows never enter a Session.
+    interaction.__dict__["id"] = row_id
+    return (
+        row_id,
+        interaction.run_id,
+        interaction.agent_id,
+        interaction.kind,
+        interaction.action,
+        interaction.item,
+        interaction.price,
+        interaction.counterparty_id,
+        interaction.details,
+        _sqlite_datetime(interaction.timestamp),
+    )
+
+
+def _skip_past(ids: Iterator[int], value: int) -> None:
+    """
+    Advance an `itertools.count` so its next ID is greater than `value`.
+    """
+    behind = value - next(ids)
+    if behind >= 0:
+        next(itertools.islice(ids, behind, behind), None)  # Consumes in C; see the itertools "consume" recipe
+
+
+def _run_stats_rows(batch: List[tuple]) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Aggregate a batch into one `RunStats` upsert per run and one
+    `AgentTradeCount` upsert per (run, agent).
+    """
+    runs: Dict[str, list] = {}
+    agents: Counter = Counter()
+    for _id, run_id, buyer_id, seller_id, _item, price, _timestamp in batch:
+        if not run_id:
+            continue
+        stats = runs.get(run_id)
+        if stats is None:
+            runs[run_id] = [1, price, price * price, price, price]
+        else:
+            stats[0] += 1
+            stats[1] += price
+            stats[2] += price * price
+            stats[3] = min(stats[3], price)
+            stats[4] = max(stats[4], price)
+        agents[(run_id, buyer_id)] += 1
+        agents[(run_id, seller_id)] += 1
+    run_rows = [(run_id, *stats) for run_id, stats in runs.items()]
+    agent_rows = [(run_id, agent_id, count) for (run_id, agent_id), count in agents.items()]
+    return run_rows, agent_rows
+
+
+class _LedgerWriter:
+    """
+    Background thread that commits queued ledger rows in batches.
+
+    A batch is committed once it holds `batch_size` rows, once its oldest row
+    has waited `flush_interval` seconds, or as soon as `flush()` is requested.
+    Queue items are row tuples, `threading.Event`s set once everything queued
+    before them is committed, or `_STOP`.
+    One writer exists per database file and is shared by every `Ledger` opened
+    on it, so a flush from any instance covers all pending rows.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = WRITE_BATCH_SIZE, flush_interval: float = WRITE_FLUSH_INTERVAL):
+        self._db_path = db_path
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = max(0.0, flush_interval)
+        # Row IDs are assigned client-side at enqueue time, continuing from the
+        # highest ID already in each table. If another process writes the same
+        # file, a colliding batch is renumbered past its rows and retried.
+        with sqlite3.connect(db_path) as conn:
+            tx_start = conn.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{Transaction.__tablename__}"').fetchone()[0]
+            log_start = conn.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{InteractionLog.__tablename__}"').fetchone()[0]
+        self.transaction_ids = itertools.count(tx_start)  # https://github.com/python/cpython/blob/main/Doc/library/itertools.rst (Context7 /python/cpython)
+        self.interaction_ids = itertools.count(log_start)
+        # SimpleQueue: unbounded, C-implemented put/get without the task
+        # accounting of queue.Queue; flushes are signalled with Events instead.
+        self._queue: "queue.SimpleQueue[object]" = queue.SimpleQueue()  # https://github.com/python/cpython/blob/main/Doc/library/queue.rst (Context7 /python/cpython)
+        self._closed = False
+        # (rows lost, error) since the last flush(); set by the writer thread
+        self._failure: Optional[Tuple[int, BaseException]] = None
+        self._thread = threading.Thread(target=self._drain, name="ledger-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, kind: int, row: tuple, model: Optional[SQLModel] = None) -> None:
+        self._queue.put_nowait((kind, row, model))
+
+    def flush(self) -> None:
+        """
+        Block until every row queued so far is committed.
+
+        Raises:
+            RuntimeError: If a batch could not be committed since the last flush
+                          (the cause is chained), or the writer thread has died.
+        """
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        # Waits in slices so a dead writer thread cannot hang the caller forever
+        while not done.wait(_FLUSH_POLL_INTERVAL):
+            if not self._thread.is_alive():
+                raise RuntimeError(f"Ledger writer for {self._db_path} has stopped; queued rows were not committed")
+        failure, self._failure = self._failure, None
+        if failure is not None:
+            lost, error = failure
+            raise RuntimeError(f"{lost} ledger rows could not be committed to {self._db_path}") from error
+
+    def close(self) -> None:
+        """
+        Commit every queued row, then stop the writer thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are managed explicitly per batch
+        conn = sqlite3.connect(self._db_path, isolation_level=None, check_same_thread=False)  # https://github.com/python/cpython/blob/main/Doc/library/sqlite3.rst (Context7 /python/cpython)
+        _apply_pragmas(conn)
+        return conn
+
+    def _reconnect(self) -> Optional[sqlite3.Connection]:
+        """
+        Open a new connection, or return None (after logging) if the file cannot
+        be opened; the next batch tries again.
+        """
+        try:
+            return self._connect()
+        except Exception:
+            logging.exception("Ledger writer could not open %s", self._db_path)
+            return None
+
+    def _recover(self, conn: sqlite3.Connection) -> Optional[sqlite3.Connection]:
+        """
+        Roll back a failed batch, reopening the connection if that fails too.
+        """
+        try:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return conn
+        except sqlite3.Error:
+            logging.exception("Ledger writer connection is unusable; reconnecting")
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return self._reconnect()
+
+    def _renumber(self, conn: sqlite3.Connection, batch: List[tuple]) -> List[tuple]:
+        """
+        Give every row of a batch a fresh ID past the highest one in the file,
+        updating the recorded models to match.
+        """
+        for table, ids in (
+            (Transaction.__tablename__, self.transaction_ids),
+            (InteractionLog.__tablename__, self.interaction_ids),
+        ):
+            _skip_past(ids, conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"').fetchone()[0])
+        renumbered = []
+        for kind, row, model in batch:
+            row_id = next(self.transaction_ids if kind == _TRANSACTION else self.interaction_ids)
+            if model is not None:
+                model.__dict__["id"] = row_id  # As in _interaction_row: no ORM state to go through
+            renumbered.append((kind, (row_id, *row[1:]), model))
+        return renumbered
+
+    def _write(self, conn: Optional[sqlite3.Connection], batch: List[tuple]) -> sqlite3.Connection:
+        """
+        Commit a batch, renumbering it if another writer took its IDs. Returns
+        the connection; raises if the batch could not be committed.
+        """
+        if conn is None:
+            conn = self._reconnect()
+            if conn is None:
+                raise sqlite3.OperationalError(f"cannot open {self._db_path}")
+        for _ in range(_ID_RETRIES):
+            try:
+                _write_batch(conn, batch)
+                return conn
+            except sqlite3.IntegrityError:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logging.warning("Ledger IDs collided with another writer of %s; renumbering %d rows", self._db_path, len(batch))
+                batch = self._renumber(conn, batch)
+        _write_batch(conn, batch)
+        return conn
+
+    def _drain(self) -> None:
+        # One connection for the writer's lifetime; it is only replaced after
+        # a failure that leaves it unusable. None while the file cannot be opened.
+        conn = self._reconnect()
+        batch_size = self._batch_size
+        flush_interval = self._flush_interval
+
+        while True:
+            batch: List[tuple] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + flush_interval
+            while type(item) is tuple:
+                batch.append(item)
+                item = None
+                if len(batch) >= batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            try:
+                if batch:
+                    conn = self._write(conn, batch)
+            except Exception as error:
+                logging.exception("Failed to persist %d ledger rows", len(batch))
+                previous = self._failure
+                self._failure = (len(batch) + (previous[0] if previous else 0), error)
+                if conn is not None:
+                    conn = self._recover(conn)
+
+            if item is _STOP:
+                if conn is not None:
+                    conn.close()
+                return
+            if item is not None:
+                item.set()  # Wake the flush() caller waiting on this marker
+
+class _MemoryWriter:
+    """
+    Writer for `:memory:` ledgers.
+
+    Rows are buffered in a list and applied to the in-memory database when a
+    read or `flush()` needs them; there is no background thread and no disk I/O.
+    """
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self.transaction_ids = itertools.count(1)
+        self.interaction_ids = itertools.count(1)
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def put(self, kind: int, row: tuple, model: Optional[SQLModel] = None) -> None:
+        self._pending.append((kind, row, model))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            raw = self._engine.raw_connection()  # https://docs.sqlalchemy.org/en/20/core/connections.html (Context7 /websites/sqlalchemy_en_20)
+            try:
+                _write_batch(raw.driver_connection, batch)
+            finally:
+                raw.close()
+
+
+def _write_batch(conn: sqlite3.Connection, batch: List[tuple]) -> None:
+    """
+    Insert a batch of queued (kind, row, model) items in one transaction.
+    """
+    transactions = [row for kind, row, _model in batch if kind == _TRANSACTION]
+    interactions = [row for kind, row, _model in batch if kind == _INTERACTION]
+    run_rows, agent_rows = _run_stats_rows(transactions)
+    conn.execute("BEGIN")
+    if transactions:
+        _insert_rows(conn, Transaction.__tablename__, _TRANSACTION_COLUMNS, transactions)
+    if interactions:
+        _insert_rows(conn, InteractionLog.__tablename__, _INTERACTION_COLUMNS, interactions)
+    if run_rows:
+        conn.executemany(_UPSERT_RUN_STATS_SQL, run_rows)
+        conn.executemany(_UPSERT_AGENT_COUNT_SQL, agent_rows)
+    conn.execute("COMMIT")
+
+
+def _apply_pragmas(dbapi_connection, connection_record=None) -> None:
+    """
+    Apply `CONNECTION_PRAGMAS` to a raw sqlite3 connection.
+
+    Also registered as the engine's "connect" event listener.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in CONNECTION_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _get_engine(db_path: str) -> Engine:
+    """
+    Return the shared engine for a database file, creating its tables once.
+    """
+    return _create_engine(os.path.abspath(db_path))
+
+
+@functools.lru_cache(maxsize=None)  # One engine (and pool) per file for the process lifetime
+def _create_engine(db_path: str) -> Engine:
+    # connect_args={"check_same_thread": False} is required for SQLite when accessed
+    # from multiple threads (readers run outside the writer thread). The pool keeps
+    # reader connections open between calls instead of reopening the file, and is
+    # capped: the hot reads and all writes use their own connections, so a few
+    # ORM connections suffice and a burst cannot pile up readers on the WAL.
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=4,
+        max_overflow=0,
+    )  # https://docs.sqlalchemy.org/en/20/core/pooling.html (Context7 /websites/sqlalchemy_en_20)
+    # In-memory ledgers never come through here, so these file-only PRAGMAs always apply
+    event.listen(engine, "connect", _apply_pragmas)  # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html (Context7 /websites/sqlalchemy_en_20)
+    SQLModel.metadata.create_all(engine)
+    _migrate_schema(engine)
+    return engine
+
+
+def _migrate_schema(engine: Engine) -> None:
+    """
+    Bring files written by older versions up to the current schema.
+
+    `PRAGMA user_version` records the last migration applied, so an up-to-date
+    file costs one PRAGMA read on the engine's own connection and no schema scan.
+    https://www.sqlite.org/pragma.html#pragma_user_version
+    """
+    with engine.begin() as conn:  # https://docs.sqlalchemy.org/en/20/core/connections.html (Context7 /websites/sqlalchemy_en_20)
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        if version >= SCHEMA_VERSION:
+            return
+        tables = (Transaction.__tablename__, InteractionLog.__tablename__)
+        if version < 1:
+            # run_id columns predate the run-scoped reports
+            for table in tables:
+                columns = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+                if "run_id" not in columns:
+                    conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN run_id TEXT')
+        if version < 2:
+            # `create_all` only builds indexes together with a new table. SQLite
+            # walks an ascending index backwards, so `ORDER BY timestamp DESC
+            # LIMIT n` reads n index entries instead of sorting the table.
+            for table in tables:
+                conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS "ix_{table}_timestamp" ON "{table}" (timestamp)')
+        if version < 3:
+            # Run-scoped reads ordered by time; the composite index also covers
+            # plain run_id lookups, so the single-column index is dropped.
+            for table in tables:
+                conn.exec_driver_sql(
+                    f'CREATE INDEX IF NOT EXISTS "ix_{table}_run_id_timestamp" ON "{table}" (run_id, timestamp)'
+                )
+                conn.exec_driver_sql(f'DROP INDEX IF EXISTS "ix_{table}_run_id"')
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+class _LedgerReader:
+    """
+    Read-only connection for the recent-row queries polled during a run.
+
+    The SQL strings are fixed and run on one long-lived connection, so sqlite3's
+    per-connection statement cache keeps them prepared. Rows become models via
+    `model_construct`, skipping validation and the ORM identity map.
+    """
+
+    _TRANSACTIONS_SQL = (
+        f'SELECT {", ".join(_TRANSACTION_COLUMNS)} FROM "{Transaction.__tablename__}" '
+        "ORDER BY timestamp DESC LIMIT ?"
+    )
+    _INTERACTIONS_SQL = (
+        f'SELECT {", ".join(_INTERACTION_COLUMNS)} FROM "{InteractionLog.__tablename__}" '
+        "ORDER BY timestamp DESC LIMIT ?"
+    )
+
+    def __init__(self, db_path: str):
+        uri = pathlib.Path(db_path).as_uri() + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)  # https://github.com/python/cpython/blob/main/Doc/library/sqlite3.rst (Context7 /python/cpython)
+        self._lock = threading.Lock()
+
+    def _stream(self, sql: str, limit: int) -> Iterator[tuple]:
+        """
+        Yield result rows `READ_CHUNK_SIZE` at a time, so only one chunk is held.
+
+        The lock is taken per chunk rather than for the whole iteration, so a
+        slow consumer does not block other readers of the shared connection.
+        """
+        with self._lock:
+            cursor = self._conn.execute(sql, (limit,))
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(READ_CHUNK_SIZE)  # https://github.com/python/cpython/blob/main/Doc/library/sqlite3.rst (Context7 /python/cpython)
+            if not rows:
+                return
+            yield from rows
+
+    def recent_transactions(self, limit: int) -> Iterator[Transaction]:
+        construct = Transaction.model_construct
+        for tx_id, run_id, buyer_id, seller_id, item, price, timestamp in self._stream(self._TRANSACTIONS_SQL, limit):
+            yield construct(
+                id=tx_id, run_id=run_id, buyer_id=buyer_id, seller_id=seller_id,
+                item=item, price=price, timestamp=_parse_sqlite_datetime(timestamp),
+            )
+
+    def recent_interactions(self, limit: int) -> Iterator[InteractionLog]:
+        construct = InteractionLog.model_construct
+        for row in self._stream(self._INTERACTIONS_SQL, limit):
+            row_id, run_id, agent_id, kind, action, item, price, counterparty_id, details, timestamp = row
+            yield construct(
+                id=row_id, run_id=run_id, agent_id=agent_id, kind=kind, action=action, item=item,
+                price=price, counterparty_id=counterparty_id, details=details,
+                timestamp=_parse_sqlite_datetime(timestamp),
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_reader(db_path: str) -> _LedgerReader:
+    return _LedgerReader(db_path)
+
+
+_WRITERS: Dict[str, _LedgerWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def _get_writer(db_path: str, batch_size: int, flush_interval: float) -> _LedgerWriter:
+    # The first Ledger opened on a file decides its writer's batching settings
+    key = os.path.abspath(db_path)
+    with _WRITERS_LOCK:
+        writer = _WRITERS.get(key)
+        if writer is None:
+            writer = _WRITERS[key] = _LedgerWriter(db_path, batch_size, flush_interval)
+        return writer
+
+
+@atexit.register  # https://github.com/python/cpython/blob/main/Doc/library/atexit.rst (Context7 /python/cpython)
+def _close_all_writers() -> None:
+    """
+    Commit rows still queued in any writer and stop the threads before the interpreter exits.
+    """
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+    for writer in writers:
+        try:
+            writer.close()
+        except Exception:
+            logging.exception("Failed to close ledger writer at exit")
+
 
 class Ledger:
     """
@@ -20,66 +601,107 @@ class Ledger:
         engine (Engine): SQLAlchemy Engine instance connected to the SQLite database.
     """
 
-    def __init__(self, db_path: str = "market.db"):
+    def __init__(
+        self,
+        db_path: str = "market.db",
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL,
+    ):
         """
         Initialize the Ledger and the database connection.
         
         Args:
-            db_path (str): File path for the SQLite database.
+            db_path (str): File path for the SQLite database, or `MEMORY_DB`
+                           (":memory:") to keep the run in RAM until `dump()`.
+            batch_size (int): Max rows committed per write batch.
+            flush_interval (float): Max seconds a queued row waits for its batch.
+                                    Both only take effect for the first Ledger
+                                    opened on a given file.
         """
-        # connect_args={"check_same_thread": False} is required for SQLite when accessed 
-        # from multiple threads (though our sim is currently single-threaded loop).
-        self.engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
-        
-        # Initialize tables
-        try:
+        if db_path == MEMORY_DB:
+            # Ephemeral run: a private in-memory database on one shared connection
+            self.engine = create_engine(
+                "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+            )  # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html (Context7 /websites/sqlalchemy_en_20)
             SQLModel.metadata.create_all(self.engine)
-        except Exception:
-            logging.exception("Failed to initialize ledger tables")
-            raise
-        self._ensure_run_id_column(db_path)
+            self._writer = _MemoryWriter(self.engine)
+            self._reader: Optional[_LedgerReader] = None
+            return
+        # Engines are shared per database file; tables are created on first use only.
+        self.engine = _get_engine(db_path)
+        self._writer = _get_writer(db_path, batch_size, flush_interval)
+        self._reader = _get_reader(os.path.abspath(db_path))
+
+    def flush(self) -> None:
+        """
+        Blocks until all queued transactions and interactions are committed.
 
-    def _ensure_run_id_column(self, db_path: str) -> None:
+        Call before shutdown, or before reading the database from another
+        connection (e.g. report generation).
         """
-        Ensure run_id columns exist for backward-compatible migrations.
+        self._writer.flush()
+
+    def dump(self, db_path: str) -> None:
         """
-        def ensure_column(cursor, table: str):
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-                (table,),
-            )
-            if cursor.fetchone() is None:
-                return
-            cursor.execute(f'PRAGMA table_info("{table}")')
-            columns = {row[1] for row in cursor.fetchall()}
-            if "run_id" not in columns:
-                cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN run_id TEXT')
+        Appends every recorded transaction and interaction to a database file.
 
+        Intended for `:memory:` ledgers at the end of a run: the file gets the
+        same rows (and run aggregates) as if the run had written to it directly.
+        Rows are renumbered to follow the IDs already in the file.
+        """
+        self.flush()
+        raw = self.engine.raw_connection()
         try:
-            with sqlite3.connect(db_path) as conn:  # https://github.com/python/cpython/blob/main/Doc/library/sqlite3.rst (Context7 /python/cpython)
-                cursor = conn.cursor()
-                ensure_column(cursor, "transaction")
-                ensure_column(cursor, "interactionlog")
-                conn.commit()
-        except sqlite3.OperationalError:
-            # Tables may not exist yet; create_all will handle them on next run.
-            return
+            conn = raw.driver_connection
+            transactions = conn.execute(
+                f'SELECT run_id, buyer_id, seller_id, item, price, timestamp FROM "{Transaction.__tablename__}" ORDER BY id'
+            ).fetchall()
+            interactions = conn.execute(
+                "SELECT run_id, agent_id, kind, action, item, price, counterparty_id, details, timestamp "
+                f'FROM "{InteractionLog.__tablename__}" ORDER BY id'
+            ).fetchall()
+        finally:
+            raw.close()
+
+        target = Ledger(db_path)
+        writer = target._writer
+        for row in transactions:
+            writer.put(_TRANSACTION, (next(writer.transaction_ids), *row))
+        for row in interactions:
+            writer.put(_INTERACTION, (next(writer.interaction_ids), *row))
+        target.flush()
 
     def record_transaction(self, transaction: Transaction) -> Transaction:
         """
-        Persists a completed transaction to the database.
+        Queues a completed transaction for persistence.
+
+        The row is committed by the background writer as part of a batch; the
+        call itself never waits on disk. The transaction's `id` is assigned
+        here, before the insert, so no read-back is needed. If another process
+        has taken that ID, the writer renumbers the row and updates `id`
+        before the next `flush()` returns.
         
         Args:
             transaction (Transaction): The transaction object to save.
             
         Returns:
-            Transaction: The refreshed transaction object (with assigned ID).
+            Transaction: The same transaction object, with `id` populated.
         """
-        with Session(self.engine) as session:
-            session.add(transaction)
-            session.commit()
-            session.refresh(transaction) # Refresh to get the auto-generated ID
-            return transaction
+        transaction.id = tx_id = next(self._writer.transaction_ids)
+        self._writer.put(
+            _TRANSACTION,
+            (
+                tx_id,
+                transaction.run_id,
+                transaction.buyer_id,
+                transaction.seller_id,
+                transaction.item,
+                transaction.price,
+                _sqlite_datetime(transaction.timestamp),
+            ),
+            transaction,
+        )
+        return transaction
 
     def get_transactions(self, limit: int = 100) -> List[Transaction]:
         """
@@ -91,24 +713,79 @@ class Ledger:
         Returns:
             List[Transaction]: List of transaction objects, sorted by newest first.
         """
+        return list(self.iter_transactions(limit))
+
+    def iter_transactions(self, limit: int = 100) -> Iterator[Transaction]:
+        """
+        Streams the most recent transactions, newest first, in chunks of
+        `READ_CHUNK_SIZE` rows instead of building the whole result list.
+        """
+        self.flush()
+        if self._reader is not None:
+            yield from self._reader.recent_transactions(limit)
+            return
         with Session(self.engine) as session:
             statement = select(Transaction).order_by(Transaction.timestamp.desc()).limit(limit)
-            return list(session.exec(statement).all())
+            yield from session.exec(statement.execution_options(yield_per=READ_CHUNK_SIZE))  # https://docs.sqlalchemy.org/en/20/orm/queryguide/api.html#fetching-large-result-sets-with-yield-per
 
-    def record_interaction(self, interaction: InteractionLog) -> InteractionLog:
+    def get_run_stats(self, run_id: str) -> Optional[RunStats]:
         """
-        Persists a non-transaction interaction (actions, negotiations) to the database.
+        Returns the running trade aggregates for a run, if any trades were recorded.
         """
+        self.flush()
         with Session(self.engine) as session:
-            session.add(interaction)
-            session.commit()
-            session.refresh(interaction)
-            return interaction
+            return session.get(RunStats, run_id)
+
+    def get_agent_trade_counts(self, run_id: str) -> List[AgentTradeCount]:
+        """
+        Returns per-agent trade counts for a run, busiest agents first.
+        """
+        self.flush()
+        with Session(self.engine) as session:
+            statement = (
+                select(AgentTradeCount)
+                .where(AgentTradeCount.run_id == run_id)
+                .order_by(AgentTradeCount.trade_count.desc(), AgentTradeCount.agent_id)
+            )
+            return list(session.exec(statement))
+
+    def record_interaction(self, interaction: InteractionLog) -> InteractionLog:
+        """
+        Queues a non-transaction interaction (actions, negotiations) for persistence.
+
+        Committed by the background writer in the same batches as transactions.
+        Like `record_transaction`, the `id` is assigned here rather than read back.
+        """
+        self._writer.put(_INTERACTION, _interaction_row(interaction, next(self._writer.interaction_ids)), interaction)
+        return interaction
+
+    def record_interactions(self, interactions: Iterable[InteractionLog]) -> None:
+        """
+        Queues a tick's worth of interactions in one call.
+
+        The rows are enqueued back to back, so the writer commits them in the
+        same batch instead of spreading them over the tick.
+        """
+        writer = self._writer
+        put = writer.put
+        ids = writer.interaction_ids
+        for interaction in interactions:
+            put(_INTERACTION, _interaction_row(interaction, next(ids)), interaction)
 
     def get_interactions(self, limit: int = 100) -> List[InteractionLog]:
         """
         Retrieves the most recent interaction logs.
         """
+        return list(self.iter_interactions(limit))
+
+    def iter_interactions(self, limit: int = 100) -> Iterator[InteractionLog]:
+        """
+        Streams the most recent interaction logs, newest first (see `iter_transactions`).
+        """
+        self.flush()
+        if self._reader is not None:
+            yield from self._reader.recent_interactions(limit)
+            return
         with Session(self.engine) as session:
             statement = select(InteractionLog).order_by(InteractionLog.timestamp.desc()).limit(limit)
-            return list(session.exec(statement).all())
+            yield from session.exec(statement.execution_options(yield_per=READ_CHUNK_SIZE))
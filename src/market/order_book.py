@@ -1,71 +1,167 @@
 """
 Order Book Implementation.
 
-This module implements a standard Limit Order Book using binary heaps.
+This module implements a standard Limit Order Book as a "heap of queues":
+each side of each item keeps a binary heap of distinct price levels plus a
+FIFO queue of resting orders per level.
 It supports adding buy (bid) and sell (ask) orders and matching them efficiently.
 
 Matching Engine Logic:
 - **Price-Time Priority**: Better prices match first. If prices are equal, earlier orders match first.
-- **Bids (Buys)**: Maintained in a MAX-Heap (highest price at root).
-- **Asks (Sells)**: Maintained in a MIN-Heap (lowest price at root).
+- **Bids (Buys)**: Price levels in a MAX-Heap (highest price at root).
+- **Asks (Sells)**: Price levels in a MIN-Heap (lowest price at root).
+- **Within a level**: Orders wait in arrival order in a `deque`; the head matches first.
+  Queue position is the time priority, so resting orders carry no timestamp and
+  ties never depend on clock resolution.
 
-Python's `heapq` module implements a Min-Heap. 
-To simulate a Max-Heap for bids, we negate the price before pushing to the heap.
+Python's `heapq` module implements a Min-Heap; bids use its max-heap
+counterparts (public from Python 3.14, private helpers before that) so bid
+prices are stored as-is rather than negated.
+The heap only changes when a price level is created or emptied; matching or
+adding at an existing level is O(1).
+
+Prices inside the book are integer ticks (see `schema.PRICE_SCALE`). Float
+prices are converted once on the way in and back on the way out.
 """
 
 import heapq
-from typing import Dict, List, Tuple, Optional
+from collections import deque
+from typing import Deque, Dict, List, Tuple, Optional
 from datetime import datetime, timezone
-from .schema import Transaction
+from .schema import Transaction, to_ticks, from_ticks
 
-class OrderBook:
+
+def _heappush_max(heap: List[int], item: int) -> None:
+    heap.append(item)
+    heapq._siftdown_max(heap, 0, len(heap) - 1)
+
+
+# Python 3.14+ exposes the max-heap functions publicly; older versions only
+# ship the private helpers. https://github.com/python/cpython/blob/main/Doc/library/heapq.rst (Context7 /python/cpython)
+_heappush_max = getattr(heapq, "heappush_max", _heappush_max)
+_heappop_max = getattr(heapq, "heappop_max", None) or heapq._heappop_max
+
+
+class BookSide:
     """
-    In-memory Limit Order Book.
-    
+    One side of one item's book. The base class is the ask side (min-heap).
+
     Attributes:
-        bids (Dict[str, List]): Per-item heap of buy orders.
-                                Format: (-price, timestamp, agent_id)
-                                Note the negative price for Max-Heap simulation.
-        asks (Dict[str, List]): Per-item heap of sell orders.
-                                Format: (price, timestamp, agent_id)
+        keys (List[int]): Heap of distinct price levels in ticks; `keys[0]` is
+                          always the best level.
+        levels (Dict[int, Deque]): Price -> FIFO of resting orders' agent IDs.
+                                   Every price in the heap has a non-empty queue.
     """
 
+    __slots__ = ("keys", "levels")
+
+    _heappush = staticmethod(heapq.heappush)
+    _heappop = staticmethod(heapq.heappop)
+
     def __init__(self):
-        # Buy orders: Max-heap per item (store negative price to simulate max-heap with python's min-heap)
-        self.bids: Dict[str, List[Tuple[float, float, str]]] = {}
-        # Sell orders: Min-heap per item
-        self.asks: Dict[str, List[Tuple[float, float, str]]] = {}
+        self.keys: List[int] = []
+        self.levels: Dict[int, Deque[str]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.keys)
 
-    def _get_bids(self, item: str) -> List[Tuple[float, float, str]]:
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.levels.values())
+
+    def push(self, key: int, agent_id: str) -> None:
         """
-        Retrieve the bid heap for a specific item. 
-        Creates a new list if one doesn't exist.
-        
-        Args:
-            item (str): The asset identifier.
-            
-        Returns:
-            List: The heap list for bids on this item.
+        Queue an order at the back of its price level, creating the level if needed.
         """
-        return self.bids.setdefault(item, [])
+        queue = self.levels.get(key)
+        if queue is None:
+            self.levels[key] = deque((agent_id,))  # https://github.com/python/cpython/blob/main/Doc/library/collections.rst (Context7 /python/cpython)
+            self._heappush(self.keys, key)
+        else:
+            queue.append(agent_id)
+
+    def pop_best(self) -> str:
+        """
+        Remove the oldest order at the best level and return its agent ID.
+        """
+        key = self.keys[0]
+        queue = self.levels[key]
+        order = queue.popleft()
+        if not queue:
+            self._heappop(self.keys)
+            del self.levels[key]
+        return order
+
+
+class BidSide(BookSide):
+    """
+    The bid side of one item's book: a max-heap, so `keys[0]` is the highest bid.
+    """
+
+    __slots__ = ()
+
+    _heappush = staticmethod(_heappush_max)
+    _heappop = staticmethod(_heappop_max)
+
+
+class OrderBook:
+    """
+    In-memory Limit Order Book.
+
+    Attributes:
+        bids (Dict[str, BidSide]): Per-item buy side (max-heap of price ticks).
+        asks (Dict[str, BookSide]): Per-item sell side (min-heap of price ticks).
+        version (int): Incremented on every change to the book, so callers can
+                       cache derived views until it moves.
+    """
+
+    def __init__(self):
+        # Buy orders: Max-heap of price levels per item
+        self.bids: Dict[str, BidSide] = {}
+        # Sell orders: Min-heap of price levels per item
+        self.asks: Dict[str, BookSide] = {}
+        # item -> (bids side, asks side); the same objects held in `bids`/`asks`
+        self._books: Dict[str, Tuple[BidSide, BookSide]] = {}
+        # Most recently used (item, sides). Simulations usually trade a single
+        # item, so this identity check replaces the dict lookup on nearly every order.
+        self._last_item: Optional[str] = None
+        self._last_book: Optional[Tuple[BidSide, BookSide]] = None
+        self.version = 0
+        # Cached top-of-book across all items (ticks) and resting order counts,
+        # kept up to date on push/pop so get_summary() does not scan every item.
+        # A pop may remove the global best, so it only marks the tops stale.
+        self._best_bid: Optional[int] = None
+        self._best_ask: Optional[int] = None
+        self._tops_stale = False
+        self._bid_count = 0
+        self._ask_count = 0
 
-    def _get_asks(self, item: str) -> List[Tuple[float, float, str]]:
+    def _get_book(self, item: str) -> Tuple[BidSide, BookSide]:
         """
-        Retrieve the ask heap for a specific item. 
-        Creates a new list if one doesn't exist.
-        
+        Retrieve the (bids, asks) sides for a specific item with one lookup.
+        Creates empty sides the first time an item is seen.
+
         Args:
             item (str): The asset identifier.
-            
+
         Returns:
-            List: The heap list for asks on this item.
+            Tuple[BidSide, BookSide]: The bid side and ask side for this item.
         """
-        return self.asks.setdefault(item, [])
+        if item is self._last_item:
+            return self._last_book
+        book = self._books.get(item)
+        if book is None:
+            book = self._books[item] = (
+                self.bids.setdefault(item, BidSide()),
+                self.asks.setdefault(item, BookSide()),
+            )
+        self._last_item = item
+        self._last_book = book
+        return book
 
     def add_buy(self, agent_id: str, item: str, price: float) -> Optional[Transaction]:
         """
         Processes a BUY order (Bid).
-        
+
         Logic:
         1. Check if there is a matching SELL order (Ask) with price <= Bid Price.
         2. If match found: Execute trade at the ASK price (Maker's price).
@@ -79,40 +175,44 @@ class OrderBook:
         Returns:
             Optional[Transaction]: A Transaction object if a trade executed, otherwise None.
         """
-        timestamp = datetime.now(timezone.utc).timestamp()  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
-        
+        ticks = to_ticks(price)
+        bids, asks = self._get_book(item)
+        self.version += 1  # Every order either matches (pop) or rests (push)
+
         # Check if we can match with existing sell orders (asks) for this item
-        # Lowest ask is at asks[0] (Min-Heap Root)
-        asks = self._get_asks(item)
+        # Lowest ask level is at asks.keys[0] (Min-Heap Root)
         if asks:
-            best_ask_price, ask_ts, seller_id = asks[0]
-            
+            best_ask_price = asks.keys[0]
+
             # If the lowest ask is cheap enough for the buyer
-            if price >= best_ask_price:
-                # MATCH! Remove the ask from the book
-                heapq.heappop(asks)
-                
+            if ticks >= best_ask_price:
+                # MATCH! Remove the oldest ask at that level from the book
+                seller_id = asks.pop_best()
+                self._ask_count -= 1
+                self._tops_stale = True
+
                 # Execution happens at the Maker's price (the one already in the book)
-                execution_price = best_ask_price
-                
+                execution_price = from_ticks(best_ask_price)
+
                 return Transaction(
                     buyer_id=agent_id,
                     seller_id=seller_id,
                     item=item,
                     price=execution_price,
-                    timestamp=datetime.utcnow()
+                    timestamp=datetime.now(timezone.utc)  # Clock read only on a match; https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
                 )
-        
+
         # No match found, add to order book as a resting order
-        # Push (-price) to simulate Max-Heap behavior with heapq
-        bids = self._get_bids(item)
-        heapq.heappush(bids, (-price, timestamp, agent_id))
+        bids.push(ticks, agent_id)
+        self._bid_count += 1
+        if self._best_bid is None or ticks > self._best_bid:
+            self._best_bid = ticks
         return None
 
     def add_sell(self, agent_id: str, item: str, price: float) -> Optional[Transaction]:
         """
         Processes a SELL order (Ask).
-        
+
         Logic:
         1. Check if there is a matching BUY order (Bid) with price >= Ask Price.
         2. If match found: Execute trade at the BID price (Maker's price).
@@ -126,42 +226,46 @@ class OrderBook:
         Returns:
             Optional[Transaction]: A Transaction object if a trade executed, otherwise None.
         """
-        timestamp = datetime.now(timezone.utc).timestamp()  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
-        
+        ticks = to_ticks(price)
+        bids, asks = self._get_book(item)
+        self.version += 1  # Every order either matches (pop) or rests (push)
+
         # Check if we can match with existing buy orders (bids) for this item
-        # Highest bid is at bids[0] (stored as negative value)
-        bids = self._get_bids(item)
+        # Highest bid level is at bids.keys[0] (Max-Heap Root)
         if bids:
-            neg_best_bid_price, bid_ts, buyer_id = bids[0]
-            best_bid_price = -neg_best_bid_price
-            
+            best_bid_price = bids.keys[0]
+
             # If the highest bid is high enough for the seller
-            if best_bid_price >= price:
-                # MATCH! Remove the bid from the book
-                heapq.heappop(bids)
-                
+            if best_bid_price >= ticks:
+                # MATCH! Remove the oldest bid at that level from the book
+                buyer_id = bids.pop_best()
+                self._bid_count -= 1
+                self._tops_stale = True
+
                 # Execution happens at the Maker's price (the bid price)
-                execution_price = best_bid_price
-                
+                execution_price = from_ticks(best_bid_price)
+
                 return Transaction(
                     buyer_id=buyer_id,
                     seller_id=agent_id,
                     item=item,
                     price=execution_price,
-                    timestamp=datetime.now(timezone.utc)
+                    timestamp=datetime.now(timezone.utc)  # Clock read only on a match; https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
                 )
-        
+
         # No match found, add to order book as a resting order
-        asks = self._get_asks(item)
-        heapq.heappush(asks, (price, timestamp, agent_id))
+        asks.push(ticks, agent_id)
+        self._ask_count += 1
+        if self._best_ask is None or ticks < self._best_ask:
+            self._best_ask = ticks
         return None
 
     def get_summary(self) -> dict:
         """
         Returns a simplified summary of the current order book state.
-        
+
         Useful for public feeds or agent observation.
-        
+
         Returns:
             dict: {
                 "best_bid": float | None,
@@ -170,35 +274,57 @@ class OrderBook:
                 "asks_count": int
             }
         """
+        if self._tops_stale:
+            self._refresh_tops()
+        best_bid = self._best_bid
+        best_ask = self._best_ask
+        return {
+            "best_bid": None if best_bid is None else from_ticks(best_bid),
+            "best_ask": None if best_ask is None else from_ticks(best_ask),
+            "bids_count": self._bid_count,
+            "asks_count": self._ask_count,
+        }
+
+    def _refresh_tops(self) -> None:
+        """
+        Recompute the cached best bid/ask across items after a match.
+        """
         best_bid = None
-        for heap in self.bids.values():
-            if not heap:
+        for side in self.bids.values():
+            if not side:
                 continue
-            price = -heap[0][0]
+            price = side.keys[0]
             if best_bid is None or price > best_bid:
                 best_bid = price
 
         best_ask = None
-        for heap in self.asks.values():
-            if not heap:
+        for side in self.asks.values():
+            if not side:
                 continue
-            price = heap[0][0]
+            price = side.keys[0]
             if best_ask is None or price < best_ask:
                 best_ask = price
-        
-        return {
-            "best_bid": best_bid,
-            "best_ask": best_ask,
-            "bids_count": sum(len(heap) for heap in self.bids.values()),
-            "asks_count": sum(len(heap) for heap in self.asks.values())
-        }
+
+        self._best_bid = best_bid
+        self._best_ask = best_ask
+        self._tops_stale = False
+
+    def get_best_quote_ticks(self, item: str) -> tuple[Optional[int], Optional[int]]:
+        """
+        Returns the best bid and ask for a specific item, in integer ticks.
+        """
+        bids = self.bids.get(item)
+        asks = self.asks.get(item)
+        best_bid = bids.keys[0] if bids else None
+        best_ask = asks.keys[0] if asks else None
+        return best_bid, best_ask
 
     def get_best_quotes(self, item: str) -> tuple[Optional[float], Optional[float]]:
         """
         Returns the best bid and ask for a specific item.
         """
-        bids = self.bids.get(item, [])
-        asks = self.asks.get(item, [])
-        best_bid = -bids[0][0] if bids else None
-        best_ask = asks[0][0] if asks else None
-        return best_bid, best_ask
+        best_bid, best_ask = self.get_best_quote_ticks(item)
+        return (
+            None if best_bid is None else from_ticks(best_bid),
+            None if best_ask is None else from_ticks(best_ask),
+        )
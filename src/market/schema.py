@@ -6,17 +6,43 @@ It utilizes:
 - `Enum` for fixed sets of values (Actions).
 - `SQLModel` (SQLAlchemy + Pydantic) for database persistence of Transactions.
 - `Pydantic` for transient data validation (MarketState).
+- `NamedTuple` for lightweight per-tick events (NegotiationEvent).
 """
 
+import sys
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, NamedTuple, Optional
 
-from pydantic import BaseModel
-from sqlmodel import Field, SQLModel
+from pydantic import BaseModel, ConfigDict
+from sqlmodel import Field, Index, SQLModel
 
 DEFAULT_ITEM = "apple"  # Module-level constant; see https://github.com/python/cpython/blob/main/Doc/tutorial/modules.rst (Context7 /python/cpython)
 
+# Fixed-point price scale: the order book keeps prices as integer ticks
+# (1 tick = 1e-8) so comparisons and midpoints stay in exact int arithmetic.
+# Floats are only used at the MarketState / Transaction boundary.
+PRICE_SCALE = 100_000_000
+# Prices at or above this overflow to inf when scaled, so they have no tick value.
+MAX_PRICE = sys.float_info.max / PRICE_SCALE
+
+
+def to_ticks(price: float) -> int:
+    """
+    Convert a float price to integer ticks.
+
+    Callers must pass a finite price with `abs(price) < MAX_PRICE`; anything
+    else raises ValueError or OverflowError.
+    """
+    return int(round(price * PRICE_SCALE))
+
+
+def from_ticks(ticks: int) -> float:
+    """
+    Convert integer ticks back to a float price.
+    """
+    return ticks / PRICE_SCALE
+
 class AgentAction(str, Enum):
     """
     Enumeration of possible actions an agent can take in a single simulation tick.
@@ -46,16 +72,60 @@ class Transaction(SQLModel, table=True):
         item (str): The identifier of the asset traded (e.g., 'apple').
         price (float): The final execution price of the trade.
         timestamp (datetime): UTC timestamp of when the trade occurred. Defaults to now.
+                              Indexed so "most recent first" reads avoid a full sort.
+
+    The (run_id, timestamp) index serves run-scoped reads in time order (the
+    report) without a sort step, and run_id-only lookups through its prefix.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_transaction_run_id_timestamp", "run_id", "timestamp"),  # https://docs.sqlalchemy.org/en/20/core/constraints.html (Context7 /websites/sqlalchemy_en_20)
+        {"extend_existing": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True, description="Unique Transaction ID")
-    run_id: Optional[str] = Field(default=None, index=True, description="Simulation run identifier")
+    run_id: Optional[str] = Field(default=None, description="Simulation run identifier")
     buyer_id: str = Field(index=True, description="ID of the buying agent")
     seller_id: str = Field(index=True, description="ID of the selling agent")
     item: str = Field(description="Name of the asset traded")
     price: float = Field(description="Execution price")
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Time of transaction (UTC)")  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True, description="Time of transaction (UTC)")  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
+
+class RunStats(SQLModel, table=True):
+    """
+    Running trade aggregates for a single simulation run.
+
+    Maintained incrementally by the `Ledger` in the same database transaction
+    as each recorded `Transaction`, so reports can read summary statistics
+    without rescanning every trade of the run.
+
+    Attributes:
+        run_id (str): Primary Key. Simulation run identifier.
+        trade_count (int): Number of trades recorded for the run.
+        price_sum (float): Sum of execution prices.
+        price_sumsq (float): Sum of squared execution prices (for variance).
+        price_min (Optional[float]): Lowest execution price.
+        price_max (Optional[float]): Highest execution price.
+    """
+    __table_args__ = {"extend_existing": True}
+
+    run_id: str = Field(primary_key=True, description="Simulation run identifier")
+    trade_count: int = Field(default=0, description="Number of trades in the run")
+    price_sum: float = Field(default=0.0, description="Sum of execution prices")
+    price_sumsq: float = Field(default=0.0, description="Sum of squared execution prices")
+    price_min: Optional[float] = Field(default=None, description="Lowest execution price")
+    price_max: Optional[float] = Field(default=None, description="Highest execution price")
+
+class AgentTradeCount(SQLModel, table=True):
+    """
+    Number of trades (as buyer or seller) per agent within a run.
+
+    Maintained incrementally by the `Ledger` alongside `RunStats`.
+    """
+    __table_args__ = {"extend_existing": True}
+
+    run_id: str = Field(primary_key=True, description="Simulation run identifier")
+    agent_id: str = Field(primary_key=True, description="ID of the trading agent")
+    trade_count: int = Field(default=0, description="Trades the agent took part in")
 
 class MarketState(BaseModel):
     """
@@ -69,7 +139,12 @@ class MarketState(BaseModel):
         current_price (float): The price of the last executed trade.
         order_book_summary (Dict[str, Any]): A simplified view of the order book 
                                              (e.g., best_bid, best_ask, counts).
+
+    Frozen: `MarketEngine.get_state` hands the same instance to every agent
+    until the market moves.
     """
+    model_config = ConfigDict(frozen=True)  # https://docs.pydantic.dev/latest/concepts/models (Context7 /websites/pydantic_dev)
+
     current_price: float
     order_book_summary: Dict[str, Any]
 
@@ -83,6 +158,8 @@ class ActionLog(BaseModel):
         price (float): The price point of the action.
         reasoning (str): The agent's explanation for their decision.
     """
+    model_config = ConfigDict(frozen=True)
+
     agent_id: str
     action: AgentAction
     price: float
@@ -91,11 +168,16 @@ class ActionLog(BaseModel):
 class InteractionLog(SQLModel, table=True):  # https://sqlmodel.tiangolo.com/tutorial/create-db-and-table (Context7 /websites/sqlmodel_tiangolo)
     """
     Records non-transaction interactions (agent actions, negotiations, commentary).
+
+    Indexed on (run_id, timestamp) like `Transaction`.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_interactionlog_run_id_timestamp", "run_id", "timestamp"),
+        {"extend_existing": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True, description="Unique Interaction ID")
-    run_id: Optional[str] = Field(default=None, index=True, description="Simulation run identifier")
+    run_id: Optional[str] = Field(default=None, description="Simulation run identifier")
     agent_id: str = Field(index=True, description="ID of the acting agent")
     kind: str = Field(description="Interaction category (e.g., action, negotiation)")
     action: Optional[str] = Field(default=None, description="Action label, if applicable")
@@ -105,5 +187,52 @@ class InteractionLog(SQLModel, table=True):  # https://sqlmodel.tiangolo.com/tut
     details: Optional[str] = Field(default=None, description="Free-form details or notes")
     timestamp: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
+        index=True,
         description="Time of interaction (UTC)",
     )  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
+
+
+class NegotiationEvent(NamedTuple):  # https://github.com/python/cpython/blob/main/Doc/library/typing.rst (Context7 /python/cpython)
+    """
+    A counter-offer produced by `MarketEngine.negotiate_price`.
+
+    Kept as a plain tuple on the hot path; the human-readable details string
+    and the `InteractionLog` row are only built when the event is persisted.
+
+    Attributes:
+        agent_id (str): ID of the agent whose order was countered.
+        action (AgentAction): BUY or SELL.
+        item (str): Asset identifier.
+        price (float): The counter-offer (midpoint) price.
+        submitted_price (float): The price the agent originally submitted.
+        opposite_price (float): Best quote on the other side of the book.
+        run_id (Optional[str]): Simulation run identifier.
+    """
+    agent_id: str
+    action: AgentAction
+    item: str
+    price: float
+    submitted_price: float
+    opposite_price: float
+    run_id: Optional[str] = None
+
+    def to_interaction(self, timestamp: Optional[datetime] = None) -> InteractionLog:
+        """
+        Build the `InteractionLog` row for this negotiation.
+        """
+        if self.action is AgentAction.BUY:
+            details = f"Counter-offer between bid {self.submitted_price} and ask {self.opposite_price}."
+        else:
+            details = f"Counter-offer between ask {self.submitted_price} and bid {self.opposite_price}."
+        # Every field is produced by the engine, so validation is skipped.
+        # https://docs.pydantic.dev/latest/api/base_model (Context7 /websites/pydantic_dev)
+        return InteractionLog.model_construct(
+            run_id=self.run_id,
+            agent_id=self.agent_id,
+            kind="negotiation",
+            action=self.action.value,
+            item=self.item,
+            price=self.price,
+            details=details,
+            timestamp=timestamp if timestamp is not None else datetime.now(timezone.utc),
+        )
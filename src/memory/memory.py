@@ -7,11 +7,65 @@ This forms the basis of Retrieval Augmented Generation (RAG) for the agents.
 """
 
 import chromadb
-from typing import List, Dict, Any
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from chromadb.api.types import EmbeddingFunction
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+import functools
+import threading
 import uuid
 import os
 from datetime import datetime, timezone
 
+MEMORY_BATCH_SIZE = 32  # Buffered memories per agent before add_memory flushes on its own
+
+# Chroma's default model, shared by every agent's collection so query vectors
+# can be computed (and cached) here instead of inside each `collection.query`.
+_EMBEDDING_FUNCTION = DefaultEmbeddingFunction()  # https://docs.trychroma.com/docs/embeddings/embedding-functions (Context7 /chroma-core/chroma)
+# The default model is downloaded and loaded lazily on its first call, without
+# a lock of its own, and agents may act on a thread pool. lru_cache does not
+# stop concurrent misses, so every forward pass made here is serialized.
+# https://github.com/python/cpython/blob/main/Doc/library/threading.rst (Context7 /python/cpython)
+_EMBEDDING_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1024)
+def _embed_query(text: str):
+    """
+    Embed a retrieval query once per process.
+
+    Agents ask the same few queries every tick ("trading decision"), so most
+    retrievals skip the model's forward pass. The cached vector is read-only.
+    """
+    with _EMBEDDING_LOCK:
+        vector = _EMBEDDING_FUNCTION([text])[0]
+    vector.setflags(write=False)
+    return vector
+
+
+def warm_up_embedder() -> None:
+    """
+    Load Chroma's default model on the calling thread.
+
+    Call this before agents start acting concurrently, so the one-time model
+    download and load never happen on several worker threads at once.
+    """
+    with _EMBEDDING_LOCK:
+        _EMBEDDING_FUNCTION(["warm up"])
+
+
+@functools.lru_cache(maxsize=None)  # One client per store for the process lifetime
+def _get_client(db_path: str) -> chromadb.ClientAPI:
+    """
+    Open (once) the persistent client for a store directory.
+
+    Every agent's collection lives in the same store, so agents share one
+    client and its SQLite handle instead of opening their own.
+    """
+    # Ensure directory exists for local persistence to avoid Chroma errors
+    os.makedirs(db_path, exist_ok=True)
+    return chromadb.PersistentClient(path=db_path)  # https://docs.trychroma.com/docs/run-chroma/persistent-client (Context7 /chroma-core/chroma)
+
+
 class AgentMemory:
     """
     Manages long-term memory for a specific agent.
@@ -20,36 +74,44 @@ class AgentMemory:
     
     Attributes:
         agent_id (str): The ID of the owner agent.
-        client (chromadb.PersistentClient): The database client.
+        client (chromadb.PersistentClient): The database client, shared by all agents on the same store.
         collection (chromadb.Collection): The vector collection for this agent.
+
+    Memories are buffered and written with one `collection.add` per `flush()`,
+    so they are embedded in a single batch. Retrieval flushes first, so a
+    query always sees every memory added before it.
     """
 
-    def __init__(self, agent_id: str, db_path: str = "./chroma_db"):
+    def __init__(self, agent_id: str, db_path: str = "./chroma_db", embedding_function: Optional[EmbeddingFunction] = None):
         """
         Initialize the memory system.
         
         Args:
             agent_id (str): Unique ID of the agent.
             db_path (str): Local filesystem path to store the vector DB.
+            embedding_function (EmbeddingFunction, optional): Shared embedder to use
+                instead of Chroma's default model. Pass the same instance to every
+                agent so `flush_memories` can embed their memories in one batch.
         """
         self.agent_id = agent_id
-        # Ensure directory exists for local persistence to avoid Chroma errors
-        os.makedirs(db_path, exist_ok=True)
-        
-        self.client = chromadb.PersistentClient(path=db_path)
+        self.client = _get_client(os.path.abspath(db_path))
+        self.embedding_function = embedding_function or _EMBEDDING_FUNCTION
         
         # Create or get a collection specific to this agent
         # Collections are isolated namespaces within Chroma
         self.collection = self.client.get_or_create_collection(
-            name=f"agent_memory_{agent_id}"
+            name=f"agent_memory_{agent_id}",
+            embedding_function=self.embedding_function,
         )
+        # (document, metadata, id) waiting for the next flush()
+        self._pending: List[Tuple[str, Dict[str, Any], str]] = []
 
     def add_memory(self, text: str, metadata: Dict[str, Any] = None):
         """
         Stores a textual memory.
         
-        The text is embedded (vectorized) by Chroma's default embedding function
-        and stored with metadata.
+        The text is queued and later embedded (vectorized) by Chroma's default
+        embedding function and stored with metadata; see `flush()`.
         
         Args:
             text (str): The content to remember.
@@ -61,11 +123,24 @@ class AgentMemory:
         # Automatically add timestamp for temporal context
         metadata.setdefault("timestamp", datetime.now(timezone.utc).timestamp())  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
 
-        self.collection.add(
-            documents=[text],
-            metadatas=[metadata],
-            ids=[str(uuid.uuid4())] # Generate unique ID for the memory fragment
-        )
+        # Generate unique ID for the memory fragment up front
+        self._pending.append((text, metadata, str(uuid.uuid4())))
+        if len(self._pending) >= MEMORY_BATCH_SIZE:
+            self.flush()
+
+    def flush(self, embeddings: Optional[List[Any]] = None) -> None:
+        """
+        Writes every queued memory to the collection in one batched `add`.
+
+        Args:
+            embeddings (List, optional): Precomputed vectors for the queued
+                documents, in order (see `flush_memories`). Chroma embeds them otherwise.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        documents, metadatas, ids = (list(column) for column in zip(*pending))
+        self.collection.add(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)  # https://docs.trychroma.com/docs/collections/add-data (Context7 /chroma-core/chroma)
 
     def retrieve_memory(self, query: str, n_results: int = 5) -> List[str]:
         """
@@ -78,13 +153,34 @@ class AgentMemory:
         Returns:
             List[str]: A list of matched memory texts.
         """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+        self.flush()
+        if self.embedding_function is _EMBEDDING_FUNCTION:
+            results = self.collection.query(query_embeddings=[_embed_query(query)], n_results=n_results)
+        else:
+            results = self.collection.query(query_texts=[query], n_results=n_results)
         
         # Chroma returns a list of lists (one per query)
         # We only queried one string, so we return the first list of documents.
-        if results and results["documents"]:
-            return results["documents"][0]
-        return []
+        return results["documents"][0] if results and results["documents"] else []
+
+
+def flush_memories(memories: Iterable[AgentMemory]) -> None:
+    """
+    Flush the queued memories of several agents, e.g. once per simulation tick.
+
+    Agents sharing an embedding function get one batched forward pass for all
+    their queued documents; each collection then receives its slice of vectors.
+    """
+    groups: Dict[int, List[AgentMemory]] = {}
+    for memory in memories:
+        if memory._pending:
+            groups.setdefault(id(memory.embedding_function), []).append(memory)
+
+    for group in groups.values():
+        documents = [text for memory in group for text, _metadata, _id in memory._pending]
+        vectors = group[0].embedding_function(documents)
+        start = 0
+        for memory in group:
+            end = start + len(memory._pending)
+            memory.flush(embeddings=list(vectors[start:end]))
+            start = end
@@ -4,7 +4,7 @@ Checkpoint utilities for saving simulation state snapshots.
 
 from __future__ import annotations
 
-from typing import Any, Iterable
+from typing import IO, Any, Iterable, Iterator
 import json
 import os
 from datetime import datetime, timezone
@@ -13,11 +13,27 @@ from pydantic import BaseModel
 
 from src.market.schema import DEFAULT_ITEM
 
+try:  # orjson ships with chromadb; fall back to the stdlib if it is missing
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Checkpoint directories already created by this process
+_ENSURED_DIRS: set[str] = set()
+
+# Indented, sorted output; aware UTC datetimes end in "Z" as with Pydantic's JSON mode.
+_ORJSON_OPTIONS = (orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
 
 def _model_to_json_dict(model: BaseModel) -> dict:
     """
     Serialize a Pydantic/SQLModel instance to a JSON-ready dict.
+
+    With orjson the field values are passed through as-is (datetimes included)
+    and encoded natively by `write_checkpoint`, skipping Pydantic serialization.
     """
+    if orjson is not None:
+        return {name: getattr(model, name) for name in type(model).model_fields}
     return model.model_dump(mode="json")  # https://docs.pydantic.dev/latest/api/base_model (Context7 /websites/pydantic_dev)
 
 
@@ -29,7 +45,13 @@ def build_checkpoint(
     interactions: Iterable[BaseModel],
 ) -> dict:
     """
-    Build a JSON-serializable checkpoint payload.
+    Build a single-use checkpoint payload for `write_checkpoint`.
+
+    The transaction and interaction rows are left as one-shot generators, so
+    `write_checkpoint` can stream them to disk one row at a time. The payload
+    is therefore consumed by that call: it is not JSON-serializable as-is and
+    cannot be written twice. Callers that need a reusable dict must
+    materialize both fields with `list()` first.
     """
     return {
         "timestamp": datetime.now(timezone.utc).isoformat(),  # https://github.com/python/cpython/blob/main/Doc/library/datetime.rst (Context7 /python/cpython)
@@ -47,17 +69,60 @@ def build_checkpoint(
             }
             for agent in agents
         ],
-        "transactions": [_model_to_json_dict(tx) for tx in transactions],
-        "interactions": [_model_to_json_dict(interaction) for interaction in interactions],
+        "transactions": (_model_to_json_dict(tx) for tx in transactions),
+        "interactions": (_model_to_json_dict(interaction) for interaction in interactions),
     }
 
 
+def _write_rows(handle: IO[bytes], rows: Iterator[Any]) -> None:
+    """
+    Stream a list value nested one level deep, one encoded row at a time.
+    """
+    separator = b"[\n    "
+    for row in rows:
+        handle.write(separator)
+        handle.write(orjson.dumps(row, option=_ORJSON_OPTIONS).replace(b"\n", b"\n    "))
+        separator = b",\n    "
+    handle.write(b"[]" if separator == b"[\n    " else b"\n  ]")
+
+
+def _write_streamed(handle: IO[bytes], payload: dict) -> None:
+    """
+    Write `payload` byte-for-byte as `orjson.dumps(payload, option=_ORJSON_OPTIONS)`
+    would, without materializing the iterator values (rows) in memory.
+    """
+    if not payload:
+        handle.write(b"{}")
+        return
+    separator = b"{\n  "
+    for key in sorted(payload):
+        value = payload[key]
+        handle.write(separator)
+        handle.write(orjson.dumps(key) + b": ")
+        if isinstance(value, Iterator):
+            _write_rows(handle, value)
+        else:
+            handle.write(orjson.dumps(value, option=_ORJSON_OPTIONS).replace(b"\n", b"\n  "))
+        separator = b",\n  "
+    handle.write(b"\n}")
+
+
 def write_checkpoint(payload: dict, checkpoint_dir: str, filename: str) -> str:
     """
     Write a checkpoint payload to disk and return the path.
     """
-    os.makedirs(checkpoint_dir, exist_ok=True)  # https://github.com/python/cpython/blob/main/Doc/faq/library.rst (Context7 /python/cpython)
+    if checkpoint_dir not in _ENSURED_DIRS:
+        # Once per directory rather than a stat/mkdir on every checkpoint
+        os.makedirs(checkpoint_dir, exist_ok=True)  # https://github.com/python/cpython/blob/main/Doc/faq/library.rst (Context7 /python/cpython)
+        _ENSURED_DIRS.add(checkpoint_dir)
     path = os.path.join(checkpoint_dir, filename)
+    if orjson is not None:
+        # Rows are encoded and written one by one; memory stays flat however
+        # many transactions/interactions the checkpoint holds.
+        with open(path, "wb") as handle:
+            _write_streamed(handle, payload)  # https://github.com/ijl/orjson#option
+        return path
+    payload = {key: list(value) if isinstance(value, Iterator) else value for key, value in payload.items()}
     with open(path, "w", encoding="utf-8") as handle:
         json.dump(payload, handle, indent=2, sort_keys=True)  # https://github.com/python/cpython/blob/main/Doc/library/json.rst (Context7 /python/cpython)
     return path
@@ -8,9 +8,13 @@ which is necessary for liquidity and price discovery.
 
 from __future__ import annotations
 
+import functools
+import itertools
 import os
+import random
+from typing import Iterator, Optional
 
-PERSONAS = [
+PERSONAS: tuple[str, ...] = (
     "A conservative long-term investor who only buys when prices are historically low and holds for long periods.",
     "A high-frequency momentum trader who buys when prices are rising and sells quickly when they dip.",
     "A panic seller who gets anxious when prices drop even slightly and sells immediately to cut losses.",
@@ -23,14 +27,19 @@ PERSONAS = [
     "A market maker who tries to profit from the spread, placing both buy and sell orders around the current price.",
     "A rumor monger who trades based on 'news' (random fluctuations) rather than price trends.",
     "A DCA (Dollar Cost Average) buyer who buys a fixed amount every tick regardless of price."
-]
+)
 
 # Keywords used to map text personas to tiers.
 STRATEGIC_KEYWORDS = ["whale", "market maker"]
 ANALYTICAL_KEYWORDS = ["value", "patient", "long-term", "conservative"]
 RULE_BASED_KEYWORDS = ["algorithmic", "disciplined", "contrarian"]
 
-PROVIDER_ORDER = os.getenv("MODEL_PROVIDER_ORDER", "openrouter,groq,gemini").split(",")
+# Normalized once at import so model resolution iterates clean provider names.
+PROVIDER_ORDER = [
+    provider.strip().lower()
+    for provider in os.getenv("MODEL_PROVIDER_ORDER", "openrouter,groq,gemini").split(",")
+    if provider.strip()
+]
 
 # OpenRouter uses OPENROUTER_API_KEY and optional OPENROUTER_API_BASE/OR_* envs.
 # https://github.com/berriai/litellm/blob/main/docs/my-website/docs/providers/openrouter.md (Context7 /berriai/litellm)
@@ -55,33 +64,80 @@ GEMINI_MODELS = {
     "fast": "gemini/gemini-1.5-flash",
 }
 
-_ROUND_ROBIN = {"strategic": 0, "analytical": 0, "rule": 0, "fast": 0}
+# tier -> candidate models, resolved from the environment on first use.
+# Provider keys are read lazily (after main.py has loaded .env) and then kept.
+_AVAILABLE_CACHE: dict[str, list[str]] = {}
+# tier -> endless round-robin over that tier's candidates, built with the cache.
+# https://github.com/python/cpython/blob/main/Doc/library/itertools.rst (Context7 /python/cpython)
+_CYCLES: dict[str, Iterator[str]] = {}
+# tier -> cumulative provider weights, only for tiers where PROVIDER_WEIGHT_* is set.
+_CUM_WEIGHTS: dict[str, list[float]] = {}
+
+
+def invalidate_model_cache() -> None:
+    """
+    Forget the resolved provider models, e.g. after API keys change at runtime.
+    """
+    _AVAILABLE_CACHE.clear()
+    _CYCLES.clear()
+    _CUM_WEIGHTS.clear()
 
 
 def _available_models(tier: str) -> list[str]:
-    models: list[str] = []
+    models = _AVAILABLE_CACHE.get(tier)
+    if models is None:
+        resolved = _resolve_models(tier)
+        # With no provider configured, every call falls back to Groq's fast model
+        models = _AVAILABLE_CACHE[tier] = [model for _, model in resolved] or [GROQ_MODELS["fast"]]
+        _CYCLES[tier] = itertools.cycle(models)
+        weights = [_provider_weight(provider) for provider, _ in resolved]
+        if any(weight is not None for weight in weights):
+            # Providers without an explicit weight count as 1.0
+            weights = [1.0 if weight is None else weight for weight in weights]
+            if sum(weights) > 0:
+                _CUM_WEIGHTS[tier] = list(itertools.accumulate(weights))
+    return models
+
+
+def _provider_weight(provider: str) -> Optional[float]:
+    """
+    Read `PROVIDER_WEIGHT_<PROVIDER>`; unset or invalid values return None.
+    """
+    raw = os.getenv(f"PROVIDER_WEIGHT_{provider.upper()}")
+    if not raw:
+        return None
+    try:
+        weight = float(raw)
+    except ValueError:
+        return None
+    return weight if weight >= 0 else None
+
+
+def _resolve_models(tier: str) -> list[tuple[str, str]]:
+    models: list[tuple[str, str]] = []
     for provider in PROVIDER_ORDER:
-        provider = provider.strip()
         if provider == "openrouter":
             model = OPENROUTER_MODELS.get(tier) or OPENROUTER_MODELS.get("fast")
             if model and os.getenv("OPENROUTER_API_KEY"):
-                models.append(model)
+                models.append((provider, model))
         elif provider == "groq" and os.getenv("GROQ_API_KEY"):
-            models.append(GROQ_MODELS[tier])
+            models.append((provider, GROQ_MODELS[tier]))
         elif provider == "gemini" and os.getenv("GEMINI_API_KEY"):
-            models.append(GEMINI_MODELS[tier])
+            models.append((provider, GEMINI_MODELS[tier]))
     return models
 
 
 def _choose_model(tier: str) -> str:
     candidates = _available_models(tier)
-    if not candidates:
-        return GROQ_MODELS["fast"]
-    index = _ROUND_ROBIN[tier] % len(candidates)
-    _ROUND_ROBIN[tier] = _ROUND_ROBIN[tier] + 1
-    return candidates[index]
+    cum_weights = _CUM_WEIGHTS.get(tier)
+    if cum_weights is not None:
+        # Weighted pick when PROVIDER_WEIGHT_* is configured; otherwise strict round-robin.
+        # https://github.com/python/cpython/blob/main/Doc/library/random.rst (Context7 /python/cpython)
+        return random.choices(candidates, cum_weights=cum_weights)[0]
+    return next(_CYCLES[tier])
 
 
+@functools.lru_cache(maxsize=64)  # https://github.com/python/cpython/blob/main/Doc/library/functools.rst (Context7 /python/cpython)
 def _persona_tier(persona: str) -> str:
     p_lower = persona.lower()
     if any(k in p_lower for k in STRATEGIC_KEYWORDS):
@@ -92,6 +148,14 @@ def _persona_tier(persona: str) -> str:
         return "rule"
     return "fast"
 
+
+# Tiers of the built-in personas, classified once at import. The model itself
+# is not cached: `_choose_model` round-robins across available providers.
+_PERSONA_TIERS = {persona: _persona_tier(persona) for persona in PERSONAS}
+# Same tiers by position in PERSONAS, for callers that pick personas by index.
+TIERS_BY_INDEX: tuple[str, ...] = tuple(_PERSONA_TIERS[persona] for persona in PERSONAS)
+
+
 def get_model_for_persona(persona: str) -> str:
     """
     Intelligently assigns an LLM model based on the complexity/archetype of the persona. 
@@ -108,5 +172,18 @@ def get_model_for_persona(persona: str) -> str:
     Returns:
         str: The model identifier string for `litellm`.
     """
-    tier = _persona_tier(persona)
+    tier = _PERSONA_TIERS.get(persona) or _persona_tier(persona)
     return _choose_model(tier)
+
+
+def get_model_by_index(index: int) -> str:
+    """
+    Same as `get_model_for_persona(PERSONAS[index])`, without classifying the persona text.
+
+    Args:
+        index (int): Position of the persona in `PERSONAS`.
+
+    Returns:
+        str: The model identifier string for `litellm`.
+    """
+    return _choose_model(TIERS_BY_INDEX[index])
@@ -0,0 +1,50 @@
+import json
+
+import orjson
+import pytest
+
+from src.market.schema import InteractionLog, MarketState, Transaction
+from src.utils import checkpoints
+from src.utils.checkpoints import build_checkpoint, write_checkpoint
+
+
+class _Portfolio:
+    def get_metrics(self, current_prices):
+        return {"cash": 100.0, "positions": {"apple": 2}}
+
+
+class _Agent:
+    id = "agent_1"
+    persona = "A patient value investor"
+    portfolio = _Portfolio()
+
+
+def _payload(transactions, interactions):
+    state = MarketState(current_price=10.0, order_book_summary={"best_bid": 9.5, "best_ask": None})
+    return build_checkpoint(1, state, [_Agent()], transactions, interactions)
+
+
+@pytest.mark.parametrize("rows", [0, 3])
+def test_streamed_checkpoint_matches_full_encode(tmp_path, rows):
+    transactions = [Transaction(id=i, buyer_id="a", seller_id="b", item="apple", price=float(i)) for i in range(rows)]
+    interactions = [InteractionLog(id=i, agent_id="a", kind="action", action="buy") for i in range(rows)]
+
+    path = write_checkpoint(_payload(transactions, interactions), str(tmp_path), "streamed.json")
+
+    expected = _payload(transactions, interactions)
+    expected = {key: list(value) if key in ("transactions", "interactions") else value for key, value in expected.items()}
+    written = open(path, "rb").read()
+    expected["timestamp"] = json.loads(written)["timestamp"]  # Only field that differs between builds
+    assert written == orjson.dumps(expected, option=checkpoints._ORJSON_OPTIONS)
+
+
+def test_stdlib_fallback_writes_same_document(tmp_path, monkeypatch):
+    transactions = [Transaction(id=1, buyer_id="a", seller_id="b", item="apple", price=5.0)]
+    streamed = json.load(open(write_checkpoint(_payload(transactions, []), str(tmp_path), "a.json")))
+
+    monkeypatch.setattr(checkpoints, "orjson", None)
+    fallback = json.load(open(write_checkpoint(_payload(transactions, []), str(tmp_path), "b.json")))
+
+    streamed.pop("timestamp")
+    fallback.pop("timestamp")
+    assert streamed == fallback
@@ -1,13 +1,17 @@
 import os
+import sys
 import tempfile
 
 import pytest
+from pydantic import ValidationError
 
 from src.market.engine import MarketEngine
 from src.market.schema import AgentAction
 
 
-@pytest.fixture
+# One file for the module: these tests never record a trade, and each builds
+# its own MarketEngine (fresh order book) on the shared, already-created schema.
+@pytest.fixture(scope="module")
 def temp_db():
     fd, path = tempfile.mkstemp(suffix=".db")
     os.close(fd)
@@ -16,7 +20,7 @@ def temp_db():
         os.remove(path)
 
 
-@pytest.mark.parametrize("price", [-1.0, 0.0, float("nan"), float("inf")])
+@pytest.mark.parametrize("price", [-1.0, 0.0, float("nan"), float("inf"), 1e301])
 def test_process_action_rejects_invalid_price(temp_db, price):
     engine = MarketEngine(temp_db)
 
@@ -28,6 +32,18 @@ def test_process_action_rejects_invalid_price(temp_db, price):
     assert summary["asks_count"] == 0
 
 
+def test_process_action_rejects_sub_tick_price(temp_db):
+    engine = MarketEngine(temp_db)
+    agent = type("Agent", (), {"id": "agent_1", "portfolio": None})()
+
+    assert engine.process_action(agent, AgentAction.SELL, "AAPL", 1e-9) is None
+    assert engine.process_action(agent, AgentAction.BUY, "AAPL", 1e-9) is None
+
+    summary = engine.order_book.get_summary()
+    assert summary["bids_count"] == 0
+    assert summary["asks_count"] == 0
+
+
 def test_process_action_rejects_empty_item(temp_db):
     engine = MarketEngine(temp_db)
 
@@ -37,3 +53,85 @@ def test_process_action_rejects_empty_item(temp_db):
     summary = engine.order_book.get_summary()
     assert summary["bids_count"] == 0
     assert summary["asks_count"] == 0
+
+
+def test_process_action_accepts_raw_action_values(temp_db):
+    engine = MarketEngine(temp_db)
+    agent = type("Agent", (), {"id": "agent_1", "portfolio": None})()
+
+    assert engine.process_action(agent, "buy", "AAPL", 10.0) is None
+    assert engine.process_action(agent, "shout", "AAPL", 10.0) is None
+
+    summary = engine.order_book.get_summary()
+    assert summary["bids_count"] == 1
+    assert summary["best_bid"] == 10.0
+
+
+def test_negotiate_price_returns_midpoint_event(temp_db):
+    engine = MarketEngine(temp_db, run_id="run_a")
+    engine.order_book.add_sell("seller", "AAPL", 12.0)
+
+    price, event = engine.negotiate_price("buyer", AgentAction.BUY, "AAPL", 10.0)
+
+    assert price == 11.0
+    assert event.opposite_price == 12.0
+    interaction = event.to_interaction()
+    assert interaction.kind == "negotiation"
+    assert interaction.run_id == "run_a"
+    assert interaction.details == "Counter-offer between bid 10.0 and ask 12.0."
+
+    assert engine.negotiate_price("buyer", AgentAction.BUY, "AAPL", 13.0) == (13.0, None)
+
+
+def test_negotiate_price_accepts_raw_action_values(temp_db):
+    engine = MarketEngine(temp_db)
+    engine.order_book.add_buy("buyer", "AAPL", 9.0)
+    engine.order_book.add_sell("seller", "AAPL", 12.0)
+
+    price, event = engine.negotiate_price("buyer", "buy", "AAPL", 10.0)
+    assert price == 11.0
+    assert event.action is AgentAction.BUY
+
+    price, event = engine.negotiate_price("seller", "sell", "AAPL", 11.0)
+    assert price == 10.0
+    assert event.action is AgentAction.SELL
+
+    assert engine.negotiate_price("agent_1", "shout", "AAPL", 10.0) == (10.0, None)
+
+
+@pytest.mark.parametrize("price", [float("nan"), float("inf"), -float("inf"), 1e301])
+@pytest.mark.parametrize("action", [AgentAction.HOLD, AgentAction.REFLECTION, AgentAction.BUY, AgentAction.SELL])
+def test_negotiate_price_passes_through_prices_without_ticks(temp_db, action, price):
+    engine = MarketEngine(temp_db)
+    engine.order_book.add_buy("buyer", "AAPL", 9.0)
+    engine.order_book.add_sell("seller", "AAPL", 12.0)
+
+    negotiated, event = engine.negotiate_price("agent_1", action, "AAPL", price)
+
+    assert event is None
+    assert negotiated is price
+
+
+def test_get_state_is_reused_until_book_changes(temp_db):
+    engine = MarketEngine(temp_db)
+
+    state = engine.get_state()
+    assert engine.get_state() is state
+
+    with pytest.raises(ValidationError):
+        state.current_price = 1.0
+
+    engine.order_book.add_buy("buyer", "AAPL", 10.0)
+    refreshed = engine.get_state()
+    assert refreshed is not state
+    assert refreshed.order_book_summary["best_bid"] == 10.0
+
+
+def test_process_action_interns_item(temp_db):
+    engine = MarketEngine(temp_db)
+    agent = type("Agent", (), {"id": "agent_1", "portfolio": None})()
+    item = "".join(["AA", "PL"])  # Built at runtime, like a symbol decoded from JSON
+
+    engine.process_action(agent, AgentAction.BUY, item, 10.0)
+
+    assert next(iter(engine.order_book.bids)) is sys.intern(item)
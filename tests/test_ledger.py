@@ -1,8 +1,14 @@
 import pytest
 import os
+import queue
+import sqlite3
+import subprocess
+import sys
 import tempfile
-from src.market.ledger import Ledger
-from src.market.schema import Transaction
+import threading
+from src.market import ledger as ledger_module
+from src.market.ledger import Ledger, MEMORY_DB, READ_CHUNK_SIZE, SCHEMA_VERSION, _TRANSACTION
+from src.market.schema import Transaction, InteractionLog, AgentAction
 
 
 class TestLedger:
@@ -23,6 +29,10 @@ class TestLedger:
         ledger = Ledger(temp_db)
         assert os.path.exists(temp_db)
     
+    def test_instances_share_engine(self, temp_db):
+        """Test that ledgers on the same file reuse one engine"""
+        assert Ledger(temp_db).engine is Ledger(temp_db).engine
+    
     def test_record_transaction(self, temp_db):
         """Test recording a transaction"""
         ledger = Ledger(temp_db)
@@ -35,10 +45,12 @@ class TestLedger:
         )
         
         ledger.record_transaction(tx)
+        assert tx.id is not None
         
         # Verify it was saved
         transactions = ledger.get_transactions(limit=1)
         assert len(transactions) == 1
+        assert transactions[0].id == tx.id
         assert transactions[0].buyer_id == "agent_1"
         assert transactions[0].seller_id == "agent_2"
         assert transactions[0].price == 10.5
@@ -62,6 +74,61 @@ class TestLedger:
         assert len(recent) == 3
         assert recent[0].price == 4.0  # Most recent first
     
+    def test_large_batch_spans_several_statements(self, temp_db):
+        """Test that a flush larger than one multi-row INSERT keeps every row"""
+        ledger = Ledger(temp_db)
+
+        for i in range(300):
+            ledger.record_transaction(Transaction(run_id="run_a", buyer_id="a", seller_id="b", item="AAPL", price=float(i)))
+
+        assert len(ledger.get_transactions(limit=1000)) == 300
+        assert ledger.get_run_stats("run_a").trade_count == 300
+    
+    def test_recent_rows_read_through_timestamp_index(self, temp_db):
+        """Test that newest-first reads scan the timestamp index instead of sorting"""
+        Ledger(temp_db)
+
+        with sqlite3.connect(temp_db) as conn:
+            for table in ("transaction", "interactionlog"):
+                plan = conn.execute(f'EXPLAIN QUERY PLAN SELECT * FROM "{table}" ORDER BY timestamp DESC LIMIT 10').fetchall()
+                assert f"USING INDEX ix_{table}_timestamp" in plan[0][3]
+    
+    def test_run_rows_read_in_time_order_without_sorting(self, temp_db):
+        """Test that run-scoped, time-ordered reads use the (run_id, timestamp) index"""
+        Ledger(temp_db)
+
+        with sqlite3.connect(temp_db) as conn:
+            for table in ("transaction", "interactionlog"):
+                plan = conn.execute(
+                    f'EXPLAIN QUERY PLAN SELECT * FROM "{table}" WHERE run_id = ? ORDER BY timestamp', ("run_a",)
+                ).fetchall()
+                assert [row[3] for row in plan] == [f"SEARCH {table} USING INDEX ix_{table}_run_id_timestamp (run_id=?)"]
+    
+    def test_legacy_file_is_migrated_once(self, temp_db):
+        """Test that files from before run_id are upgraded and stamped with the schema version"""
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute(
+                'CREATE TABLE "transaction" (id INTEGER PRIMARY KEY, buyer_id TEXT, seller_id TEXT, '
+                "item TEXT, price FLOAT, timestamp DATETIME)"
+            )
+
+        ledger = Ledger(temp_db)
+        ledger.record_transaction(Transaction(run_id="run_a", buyer_id="a", seller_id="b", item="AAPL", price=3.0))
+
+        assert ledger.get_transactions()[0].run_id == "run_a"
+        with sqlite3.connect(temp_db) as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    
+    def test_iter_transactions_streams_past_one_chunk(self, temp_db):
+        """Test that streamed reads return every row, newest first, across chunks"""
+        ledger = Ledger(temp_db)
+        for i in range(READ_CHUNK_SIZE + 10):
+            ledger.record_transaction(Transaction(buyer_id="a", seller_id="b", item="AAPL", price=float(i)))
+
+        prices = [tx.price for tx in ledger.iter_transactions(limit=READ_CHUNK_SIZE + 5)]
+        assert len(prices) == READ_CHUNK_SIZE + 5
+        assert len(set(prices)) == len(prices)
+    
     def test_persistence(self, temp_db):
         """Test that data persists across Ledger instances"""
         # Create and record
@@ -75,3 +142,152 @@ class TestLedger:
         
         assert len(transactions) == 1
         assert transactions[0].price == 99.9
+
+    def test_writer_recovers_after_failed_batch(self, temp_db):
+        """Test that a failed batch is rolled back and reported without stopping the writer"""
+        ledger = Ledger(temp_db)
+
+        ledger._writer.put(_TRANSACTION, ("malformed",))
+        with pytest.raises(RuntimeError, match="1 ledger rows could not be committed"):
+            ledger.flush()
+        ledger.flush()  # Reported once
+        ledger.record_transaction(Transaction(buyer_id="a", seller_id="b", item="AAPL", price=1.0))
+
+        assert [tx.price for tx in ledger.get_transactions()] == [1.0]
+
+    def test_writer_survives_failed_reconnect(self, temp_db, monkeypatch):
+        """Test that a writer whose file cannot be reopened keeps running and retries"""
+        ledger = Ledger(temp_db)
+        writer = ledger._writer
+
+        def broken_batch(conn, batch):
+            conn.close()
+            raise sqlite3.OperationalError("disk I/O error")
+
+        def refuse():
+            raise sqlite3.OperationalError("unable to open database file")
+
+        monkeypatch.setattr(ledger_module, "_write_batch", broken_batch)
+        monkeypatch.setattr(writer, "_connect", refuse)
+        ledger.record_transaction(Transaction(buyer_id="a", seller_id="b", item="AAPL", price=1.0))
+        with pytest.raises(RuntimeError):
+            ledger.flush()
+        assert writer._thread.is_alive()
+
+        monkeypatch.undo()
+        ledger.record_transaction(Transaction(buyer_id="a", seller_id="b", item="AAPL", price=2.0))
+        assert [tx.price for tx in ledger.get_transactions()] == [2.0]
+
+    def test_ids_taken_by_another_writer_are_renumbered(self, temp_db):
+        """Test that rows colliding with another process's IDs are renumbered, not dropped"""
+        ledger = Ledger(temp_db)
+        ledger.record_transaction(Transaction(buyer_id="a", seller_id="b", item="AAPL", price=1.0))
+        ledger.flush()
+        # Another process appends rows using the IDs this writer will hand out next
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute(
+                'INSERT INTO "transaction" (id, buyer_id, seller_id, item, price, timestamp) '
+                "VALUES (2, 'x', 'y', 'AAPL', 50.0, '2024-01-01 00:00:00.000000')"
+            )
+            conn.execute(
+                "INSERT INTO interactionlog (id, agent_id, kind, timestamp) "
+                "VALUES (1, 'x', 'action', '2024-01-01 00:00:00.000000')"
+            )
+
+        tx = ledger.record_transaction(Transaction(buyer_id="a", seller_id="b", item="AAPL", price=2.0))
+        interaction = ledger.record_interaction(InteractionLog(agent_id="a", kind="action"))
+        ledger.flush()
+
+        assert tx.id not in (1, 2)
+        assert interaction.id != 1
+        with sqlite3.connect(temp_db) as conn:
+            assert conn.execute('SELECT price FROM "transaction" WHERE id = ?', (tx.id,)).fetchone() == (2.0,)
+            assert conn.execute("SELECT agent_id FROM interactionlog WHERE id = ?", (interaction.id,)).fetchone() == ("a",)
+
+    def test_flush_raises_when_writer_is_gone(self, temp_db, monkeypatch):
+        """Test that flush() fails instead of waiting forever on a dead writer thread"""
+        writer = Ledger(temp_db)._writer
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        monkeypatch.setattr(writer, "_thread", dead)
+        monkeypatch.setattr(writer, "_queue", queue.SimpleQueue())
+
+        with pytest.raises(RuntimeError):
+            writer.flush()
+
+    def test_run_stats_track_recorded_trades(self, temp_db):
+        """Test that per-run aggregates are maintained on every insert"""
+        ledger = Ledger(temp_db)
+
+        for buyer, price in [("agent_1", 10.0), ("agent_2", 14.0), ("agent_1", 12.0)]:
+            ledger.record_transaction(
+                Transaction(run_id="run_a", buyer_id=buyer, seller_id="agent_3", item="AAPL", price=price)
+            )
+        # Other runs and run-less trades must not leak into the aggregates
+        ledger.record_transaction(Transaction(run_id="run_b", buyer_id="x", seller_id="y", item="AAPL", price=99.0))
+        ledger.record_transaction(Transaction(buyer_id="x", seller_id="y", item="AAPL", price=99.0))
+
+        stats = ledger.get_run_stats("run_a")
+        assert stats.trade_count == 3
+        assert stats.price_sum == 36.0
+        assert stats.price_sumsq == 100.0 + 196.0 + 144.0
+        assert stats.price_min == 10.0
+        assert stats.price_max == 14.0
+
+        counts = {row.agent_id: row.trade_count for row in ledger.get_agent_trade_counts("run_a")}
+        assert counts == {"agent_3": 3, "agent_1": 2, "agent_2": 1}
+
+    def test_record_interaction(self, temp_db):
+        """Test that queued interactions are readable after recording"""
+        ledger = Ledger(temp_db)
+
+        interaction = ledger.record_interaction(
+            InteractionLog(run_id="run_a", agent_id="agent_1", kind="action", action=AgentAction.BUY, item="AAPL", price=10.0)
+        )
+        assert interaction.id is not None
+
+        interactions = Ledger(temp_db).get_interactions(limit=1)
+        assert len(interactions) == 1
+        assert interactions[0].id == interaction.id
+        assert interactions[0].agent_id == "agent_1"
+        assert interactions[0].action == "buy"
+        assert interactions[0].price == 10.0
+
+    def test_record_interactions_queues_a_tick(self, temp_db):
+        """Test that a tick's interactions are recorded together with distinct IDs"""
+        ledger = Ledger(temp_db)
+        tick = [InteractionLog(run_id="run_a", agent_id=f"agent_{i}", kind="action", price=float(i)) for i in range(3)]
+
+        ledger.record_interactions(tick)
+
+        assert len({interaction.id for interaction in tick}) == 3
+        assert sorted(i.agent_id for i in ledger.get_interactions()) == ["agent_0", "agent_1", "agent_2"]
+
+    def test_memory_ledger_dumps_to_file(self, temp_db):
+        """Test that an in-memory run is readable and can be written out at the end"""
+        ledger = Ledger(MEMORY_DB)
+        ledger.record_transaction(Transaction(run_id="run_a", buyer_id="a", seller_id="b", item="AAPL", price=5.0))
+        ledger.record_interaction(InteractionLog(run_id="run_a", agent_id="a", kind="action", price=5.0))
+
+        assert ledger.get_run_stats("run_a").trade_count == 1
+        assert not Ledger(MEMORY_DB).get_transactions()
+
+        ledger.dump(temp_db)
+        on_disk = Ledger(temp_db)
+        assert [tx.price for tx in on_disk.get_transactions()] == [5.0]
+        assert [i.agent_id for i in on_disk.get_interactions()] == ["a"]
+        assert on_disk.get_run_stats("run_a").price_sum == 5.0
+
+    def test_queued_rows_are_flushed_at_exit(self, temp_db):
+        """Test that rows still queued when the process exits are committed"""
+        script = (
+            "from src.market.ledger import Ledger\n"
+            "from src.market.schema import Transaction\n"
+            "ledger = Ledger(%r, flush_interval=60.0)\n"
+            "ledger.record_transaction(Transaction(buyer_id='a', seller_id='b', item='AAPL', price=7.0))\n"
+        ) % temp_db
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", script], cwd=root, check=True)
+
+        assert [tx.price for tx in Ledger(temp_db).get_transactions()] == [7.0]
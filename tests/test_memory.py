@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from chromadb.api.types import EmbeddingFunction
+
+from src.memory.memory import AgentMemory, flush_memories
+
+
+class CountingEmbedding(EmbeddingFunction):
+    """Deterministic offline embedder that counts forward passes"""
+
+    def __init__(self):
+        self.calls = 0
+
+    @staticmethod
+    def name():
+        return "counting"
+
+    def __call__(self, input):
+        self.calls += 1
+        return [np.array([float(len(text)), 1.0, 0.0], dtype=np.float32) for text in input]
+
+
+class TestAgentMemory:
+    """Unit tests for buffered agent memory"""
+
+    @pytest.fixture
+    def embedder(self):
+        return CountingEmbedding()
+
+    def test_flush_memories_embeds_all_agents_in_one_batch(self, tmp_path, embedder):
+        """Queued memories of agents sharing an embedder cost one forward pass"""
+        first = AgentMemory("a", str(tmp_path), embedding_function=embedder)
+        second = AgentMemory("b", str(tmp_path), embedding_function=embedder)
+        first.add_memory("bought at 10")
+        first.add_memory("sold at 12")
+        second.add_memory("held")
+
+        flush_memories([first, second])
+
+        assert embedder.calls == 1
+        assert first.collection.count() == 2
+        assert second.collection.count() == 1
+
+    def test_retrieve_sees_queued_memories(self, tmp_path, embedder):
+        """Retrieval flushes first, so it sees every memory added before it"""
+        memory = AgentMemory("a", str(tmp_path), embedding_function=embedder)
+        memory.add_memory("bought at 10")
+
+        assert memory.retrieve_memory("bought at 10", n_results=1) == ["bought at 10"]
+
+        memory.add_memory("sold at 12")
+        assert memory.retrieve_memory("sold at 12", n_results=1) == ["sold at 12"]
@@ -101,3 +101,49 @@ class TestOrderBook:
         summary = book.get_summary()
         assert summary["bids_count"] == 1
         assert summary["asks_count"] == 1
+
+    def test_prices_compare_in_fixed_point(self):
+        """Float rounding noise should not prevent a match at the same price"""
+        book = OrderBook()
+
+        book.add_sell("seller", "AAPL", 0.3)
+        match = book.add_buy("buyer", "AAPL", 0.1 + 0.2)
+
+        assert match is not None
+        assert match.price == 0.3
+
+    def test_summary_tracks_best_quotes_across_items_after_matches(self):
+        """Cached top-of-book and counts stay correct as orders match"""
+        book = OrderBook()
+
+        book.add_sell("s1", "AAPL", 9.0)
+        book.add_sell("s2", "MSFT", 11.0)
+        book.add_buy("b1", "MSFT", 8.0)
+        assert book.get_summary() == {"best_bid": 8.0, "best_ask": 9.0, "bids_count": 1, "asks_count": 2}
+
+        # Matching removes the global best ask; the next best comes from MSFT
+        book.add_buy("b2", "AAPL", 10.0)
+        assert book.get_summary() == {"best_bid": 8.0, "best_ask": 11.0, "bids_count": 1, "asks_count": 1}
+
+    def test_equal_prices_match_in_arrival_order(self):
+        """Orders resting at the same price level fill first-in, first-out"""
+        book = OrderBook()
+
+        for seller in ("seller1", "seller2", "seller3"):
+            book.add_sell(seller, "AAPL", 10.0)
+
+        fills = [book.add_buy(f"buyer{i}", "AAPL", 10.0).seller_id for i in range(3)]
+        assert fills == ["seller1", "seller2", "seller3"]
+        assert book.get_summary()["asks_count"] == 0
+
+    def test_bids_fill_from_highest_price_level(self):
+        """The bid side is a max-heap: higher bids fill first"""
+        book = OrderBook()
+
+        for buyer, price in (("b5", 5.0), ("b8", 8.0), ("b6", 6.0)):
+            book.add_buy(buyer, "AAPL", price)
+
+        assert book.get_best_quotes("AAPL") == (8.0, None)
+        assert book.add_sell("s1", "AAPL", 1.0).buyer_id == "b8"
+        assert book.add_sell("s2", "AAPL", 1.0).buyer_id == "b6"
+        assert book.get_best_quotes("AAPL") == (5.0, None)
@@ -1,3 +1,5 @@
+import math
+
 import pytest
 from src.agents.portfolio import Portfolio
 
@@ -98,3 +100,32 @@ class TestPortfolio:
         # ROI: (1000 / 10000) * 100 = 10%
         assert metrics["total_pnl"] == 1000.0
         assert metrics["roi"] == 10.0
+
+    def test_metrics_track_state_changes(self):
+        """Test that metrics are fresh dicts and follow trades and price changes"""
+        p = Portfolio(cash=1000.0)
+        p.execute_buy("AAPL", 10, 50.0)
+        current_prices = {"AAPL": 60.0}
+
+        first = p.get_metrics(current_prices)
+        first["positions"]["AAPL"] = 0
+        second = p.get_metrics(current_prices)
+        assert second is not first
+        assert second["positions"] == {"AAPL": 10}
+        assert second["unrealized_pnl"] == 100.0
+
+        assert p.get_metrics({"AAPL": 70.0})["unrealized_pnl"] == 200.0
+        p.execute_sell("AAPL", 5, 60.0)
+        assert p.get_metrics(current_prices)["unrealized_pnl"] == 50.0
+
+    def test_realized_pnl_does_not_drift(self):
+        """Test that many small realized gains sum without rounding drift"""
+        p = Portfolio(cash=100000.0)
+        p.execute_buy("AAPL", 10000, 1.0)
+
+        gains = []
+        for _ in range(10000):
+            p.execute_sell("AAPL", 1, 1.1)
+            gains.append(1.1 - 1.0)
+
+        assert p.realized_pnl == math.fsum(gains)
@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, create_engine
+
+from src.analysis import report as report_module
+from src.analysis.report import generate_report
+from src.market.ledger import Ledger
+from src.market.schema import InteractionLog, Transaction
+
+# Ledger layout from before RunStats/AgentTradeCount existed
+_LEGACY_SCHEMA = """
+CREATE TABLE "transaction" (
+    id INTEGER PRIMARY KEY, run_id VARCHAR, buyer_id VARCHAR, seller_id VARCHAR,
+    item VARCHAR, price FLOAT, timestamp DATETIME
+);
+CREATE TABLE interactionlog (
+    id INTEGER PRIMARY KEY, run_id VARCHAR, agent_id VARCHAR, kind VARCHAR, action VARCHAR,
+    item VARCHAR, price FLOAT, counterparty_id VARCHAR, details VARCHAR, timestamp DATETIME
+);
+"""
+
+
+def test_legacy_file_without_run_stats_scans_trades(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(_LEGACY_SCHEMA)
+        conn.executemany(
+            'INSERT INTO "transaction" (run_id, buyer_id, seller_id, item, price, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                ("run_a", "agent_1", "agent_2", "apple", 10.0, "2024-01-01 00:00:01"),
+                ("run_a", "agent_1", "agent_3", "apple", 14.0, "2024-01-01 00:00:02"),
+                ("run_b", "agent_9", "agent_8", "apple", 99.0, "2024-01-01 00:00:03"),
+            ],
+        )
+        conn.execute(
+            "INSERT INTO interactionlog (run_id, agent_id, kind, timestamp) VALUES (?, ?, ?, ?)",
+            ("run_a", "agent_1", "action", "2024-01-01 00:00:01"),
+        )
+
+    report_dir = generate_report("run_a", db_path, str(tmp_path / "reports"), agents=[], current_price=14.0)
+
+    report = open(f"{report_dir}/report.md", encoding="utf-8").read()
+    assert "- Total trades: 2" in report
+    assert "- Avg price: 12.0" in report
+    assert "agent_1 | 2" in report
+
+
+def test_empty_run_writes_placeholder_without_pandas(tmp_path):
+    db_path = str(tmp_path / "market.db")
+    Ledger(db_path)
+    report_root = str(tmp_path / "reports")
+    script = (
+        "import sys\n"
+        "from src.analysis.report import generate_report\n"
+        "generate_report('run_empty', %r, %r, agents=[], current_price=0.0)\n"
+        "print('pandas' in sys.modules, 'matplotlib' in sys.modules)\n"
+    ) % (db_path, report_root)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, check=True, capture_output=True, text=True)
+
+    assert result.stdout.split() == ["False", "False"]
+    assert "No data recorded for this run." in open(f"{report_root}/run_empty/report.md", encoding="utf-8").read()
+    index = json.load(open(f"{report_root}/index.json", encoding="utf-8"))
+    assert [(entry["run_id"], entry["total_trades"]) for entry in index] == [("run_empty", 0)]
+
+
+def test_run_summary_comes_from_run_stats(tmp_path):
+    db_path = str(tmp_path / "market.db")
+    ledger = Ledger(db_path)
+    prices = [10.0, 14.0, 12.0]
+    for buyer, price in zip(["agent_1", "agent_2", "agent_1"], prices):
+        ledger.record_transaction(Transaction(run_id="run_a", buyer_id=buyer, seller_id="agent_3", item="apple", price=price))
+    ledger.record_interaction(InteractionLog(run_id="run_a", agent_id="agent_1", kind="negotiation"))
+    ledger.flush()
+    # Drop the trade rows: the summary and trade counts must come from the aggregates alone
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('DELETE FROM "transaction"')
+
+    report_dir = generate_report("run_a", db_path, str(tmp_path / "reports"), agents=[], current_price=12.0)
+
+    report = open(f"{report_dir}/report.md", encoding="utf-8").read()
+    assert "- Total trades: 3" in report
+    assert "- Min price: 10.0" in report
+    assert "- Max price: 14.0" in report
+    assert f"- Volatility (std): {statistics.stdev(prices)}" in report
+    assert "agent_3 | 3" in report
+    assert "- Negotiation events: 1" in report
+
+
+def test_price_series_is_downsampled_for_long_runs(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "market.db")
+    ledger = Ledger(db_path)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(5):
+        ledger.record_transaction(
+            Transaction(
+                run_id="run_a", buyer_id="agent_1", seller_id="agent_2", item="apple",
+                price=10.0 + i, timestamp=start + timedelta(seconds=i),
+            )
+        )
+    ledger.flush()
+    monkeypatch.setattr(report_module, "MAX_PLOT_POINTS", 2)
+
+    with Session(create_engine(f"sqlite:///{db_path}")) as session:
+        sampled = [price for _timestamp, price in report_module._load_price_series(session, "run_a", 5)]
+        full = [price for _timestamp, price in report_module._load_price_series(session, "run_a", 2)]
+
+    assert sampled == [10.0, 13.0]
+    assert full == [10.0, 11.0, 12.0, 13.0, 14.0]
+
+    report_dir = generate_report("run_a", db_path, str(tmp_path / "reports"), agents=[], current_price=14.0)
+    report = open(f"{report_dir}/report.md", encoding="utf-8").read()
+    assert "- Total trades: 5" in report
+    assert "- Max price: 14.0" in report
+    assert os.path.exists(f"{report_dir}/price_history.png")
@@ -1,15 +1,52 @@
+import threading
+import time
+import numpy as np
 import pytest
-from unittest.mock import Mock, patch
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from unittest.mock import patch
+from chromadb.api.types import EmbeddingFunction
 from src.agents.trader import Trader
+from src.memory import memory as memory_module
 from src.market.schema import MarketState, AgentAction
 
+# Minimal stand-ins for litellm's response.choices[0].message.content
+_Response = namedtuple("_Response", ["choices"])
+_Choice = namedtuple("_Choice", ["message"])
+_Message = namedtuple("_Message", ["content"])
+
+
+class _OverlapCheckingEmbedding(EmbeddingFunction):
+    """Offline stand-in for Chroma's default model that records overlapping forward passes"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self.active = 0
+        self.overlaps = 0
+        self.calls = 0
+
+    @staticmethod
+    def name():
+        return "overlap-checking"
+
+    def __call__(self, input):
+        with self._guard:
+            self.active += 1
+            self.calls += 1
+            self.overlaps += self.active > 1
+        time.sleep(0.01)  # Long enough for unserialized callers to overlap
+        with self._guard:
+            self.active -= 1
+        return [np.array([float(len(text)), 1.0, 0.0], dtype=np.float32) for text in input]
+
 
 class TestTrader:
     """Unit tests for Trader agent logic"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def mock_market_state(self):
-        """Create a mock market state"""
+        """Create a mock market state (frozen, so safe to share across tests)"""
         return MarketState(
             current_price=10.0,
             order_book_summary={
@@ -36,9 +73,9 @@ class TestTrader:
     def test_act_returns_valid_decision(self, mock_completion, mock_market_state):
         """Test that act() returns a properly structured decision"""
         # Mock LLM response - note lowercase action and item field
-        mock_completion.return_value = Mock(
-            choices=[Mock(
-                message=Mock(
+        mock_completion.return_value = _Response(
+            choices=[_Choice(
+                message=_Message(
                     content='{"action": "buy", "item": "AAPL", "price": 10.0, "reasoning": "Test reason"}'
                 )
             )]
@@ -67,9 +104,9 @@ class TestTrader:
     @patch('src.agents.trader.completion')
     def test_act_with_reflection_action(self, mock_completion, mock_market_state):
         """Test that reflection actions are handled"""
-        mock_completion.return_value = Mock(
-            choices=[Mock(
-                message=Mock(
+        mock_completion.return_value = _Response(
+            choices=[_Choice(
+                message=_Message(
                     content='{"action": "reflection", "item": "AAPL", "price": 0.0, "reasoning": "Waiting for better price"}'
                 )
             )]
@@ -85,9 +122,9 @@ class TestTrader:
     @patch('src.agents.trader.completion')
     def test_act_handles_dict_content(self, mock_completion, mock_market_state):
         """Test that act() handles already-parsed dict content"""
-        mock_completion.return_value = Mock(
-            choices=[Mock(
-                message=Mock(
+        mock_completion.return_value = _Response(
+            choices=[_Choice(
+                message=_Message(
                     content={"action": "buy", "item": "AAPL", "price": 10.0, "reasoning": "Parsed dict"}
                 )
             )]
@@ -98,3 +135,28 @@ class TestTrader:
 
         assert decision is not None
         assert decision["action"] == AgentAction.BUY
+
+    @patch('src.agents.trader.completion')
+    def test_act_on_thread_pool_serializes_default_embedder(self, mock_completion, mock_market_state, tmp_path, monkeypatch):
+        """Test that concurrent act() calls never run the shared embedder at the same time"""
+        mock_completion.return_value = _Response(
+            choices=[_Choice(
+                message=_Message(
+                    content='{"action": "buy", "item": "AAPL", "price": 10.0, "reasoning": "Pooled"}'
+                )
+            )]
+        )
+        embedder = _OverlapCheckingEmbedding()
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(memory_module, "_EMBEDDING_FUNCTION", embedder)
+        memory_module._embed_query.cache_clear()
+        try:
+            traders = [Trader(f"pool_agent_{i}", "Test persona", "gpt-4o-mini") for i in range(4)]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                decisions = list(executor.map(Trader.act, traders, repeat(mock_market_state)))
+        finally:
+            memory_module._embed_query.cache_clear()
+
+        assert [decision["action"] for decision in decisions] == [AgentAction.BUY] * 4
+        assert embedder.calls >= 1
+        assert embedder.overlaps == 0